@@ -1,103 +1,110 @@
 # app.py - Complete version with Translation, TTS, File Upload, and Full UX Enhancements
 import streamlit as st
-import google.generativeai as genai
-from gtts import gTTS  
-import io  
+import uuid
+from contextlib import contextmanager
 from datetime import datetime
-import pandas as pd
-import PyPDF2
-import docx
-import re
-
-# Validation functions
-def validate_text_length(text, max_length=5000):
-    """Validate text length for translation"""
-    if not text or not text.strip():
-        return False, "Please enter some text to translate"
-    
-    char_count = len(text.strip())
-    if char_count > max_length:
-        return False, f"Text is too long ({char_count:,} characters). Maximum allowed: {max_length:,} characters"
-    
-    if char_count < 3:
-        return False, "Text is too short. Please enter at least 3 characters"
-    
-    return True, ""
+from translation_engine import DEFAULT_MODEL_NAME, chunk_text, stream_document, translate_document
+from translation_cache import TranslationCache
+import client_pool
+from audio_cache import AudioCache
+from blob_store import BlobStore
+from tts_engine import SentencePipeline, synthesize_speech
+from file_extraction import (ExtractionCache, count_pages, file_content_hash, iter_text,
+                             parse_page_ranges, supports_page_ranges)
+from fanout import DEFAULT_CONCURRENCY, build_zip, synthesize_many, translate_to_many
+from language_detection import detect_language_info, is_same_language
+from metrics import get_metrics
+from rate_limiter import get_scheduler
+from prompt_packing import translate_segments
+from translation_memory import TranslationMemory, translate_with_memory
+from pipeline import SUPPORTED_LANGUAGES, create_model
+from validation import (MAX_TEXT_LENGTH, sanitize_filename, translation_error_message, validate_api_key,
+                        validate_file_size, validate_text_length)
+from table_translation import TABLE_TYPES, load_table, to_csv_bytes, to_excel_bytes, translate_table
 
-def validate_api_key(api_key):
-    """Validate API key format"""
-    if not api_key or not api_key.strip():
-        return False, "API key is required"
-    
-    # Basic format check for Google API key
-    if not api_key.startswith('AIza'):
-        return False, "Invalid API key format. Google API keys should start with 'AIza'"
-    
-    if len(api_key) < 30:
-        return False, "API key appears to be incomplete"
-    
-    return True, ""
+# Rows of a translated table kept in session state for display; the full table is in the blob store
+TABLE_PREVIEW_ROWS = 500
+# Streamed text is frozen into a finished block past this length, so each update only re-sends the tail
+STREAM_BLOCK_CHARS = 2000
+EXPIRED_MESSAGE = "⌛ These results were cleared after a period of inactivity. Please translate again."
 
-def detect_language_info(text):
-    """Detect input language characteristics"""
-    if not text:
-        return "No text provided"
-    
-    # Simple language detection based on character patterns
-    if re.search(r'[一-龯]', text):
-        return "🇨🇳 Chinese characters detected"
-    elif re.search(r'[あ-ん]|[ア-ン]|[ひ-ゞ]', text):
-        return "🇯🇵 Japanese characters detected"
-    elif re.search(r'[가-힣]', text):
-        return "🇰🇷 Korean characters detected"
-    elif re.search(r'[а-я]', text, re.IGNORECASE):
-        return "🇷🇺 Cyrillic characters detected"
-    elif re.search(r'[א-ת]', text):
-        return "🇮🇱 Hebrew characters detected"
-    elif re.search(r'[ا-ي]', text):
-        return "🇸🇦 Arabic characters detected"
-    elif re.search(r'[ñáéíóúü]', text, re.IGNORECASE):
-        return "🇪🇸 Spanish characters detected"
-    elif re.search(r'[àâäéèêëïîôöùûüÿç]', text, re.IGNORECASE):
-        return "🇫🇷 French characters detected"
-    elif re.search(r'[äöüß]', text, re.IGNORECASE):
-        return "🇩🇪 German characters detected"
-    else:
-        return "🇺🇸 Latin characters detected"
-
-def validate_file_size(file_size, max_size_mb=10):
-    """Validate uploaded file size"""
-    max_size_bytes = max_size_mb * 1024 * 1024
-    if file_size > max_size_bytes:
-        return False, f"File is too large ({file_size/1024/1024:.1f} MB). Maximum allowed: {max_size_mb} MB"
-    return True, ""
-
-def sanitize_filename(filename):
-    """Create safe filename for downloads"""
-    # Remove unsafe characters
-    safe_name = re.sub(r'[<>:"/\\|?*]', '_', filename)
-    # Remove extra spaces and dots
-    safe_name = re.sub(r'[.\s]+', '_', safe_name)
-    return safe_name[:50]  # Limit length
-
-# Language configuration with TTS support
-SUPPORTED_LANGUAGES = {
-    "Spanish": {"code": "es", "native_name": "Español"},
-    "French": {"code": "fr", "native_name": "Français"},
-    "German": {"code": "de", "native_name": "Deutsch"},
-    "Italian": {"code": "it", "native_name": "Italiano"},
-    "Portuguese": {"code": "pt", "native_name": "Português"},
-    "Russian": {"code": "ru", "native_name": "Русский"},
-    "Japanese": {"code": "ja", "native_name": "日本語"},
-    "Korean": {"code": "ko", "native_name": "한국어"},
-    "Chinese": {"code": "zh", "native_name": "中文"},
-    "Arabic": {"code": "ar", "native_name": "العربية"},
-    "Hindi": {"code": "hi", "native_name": "हिन्दी"},
-    "Dutch": {"code": "nl", "native_name": "Nederlands"},
-    "Polish": {"code": "pl", "native_name": "Polski"},
-    "Turkish": {"code": "tr", "native_name": "Türkçe"},
-    "Swedish": {"code": "sv", "native_name": "Svenska"}
-}
+@st.cache_resource
+def get_translation_cache():
+    """Shared translation cache for all sessions in this process"""
+    return TranslationCache()
+
+@st.cache_resource
+def get_translation_memory():
+    """Shared segment-level translation memory for all sessions in this process"""
+    return TranslationMemory()
+
+@st.cache_resource
+def get_audio_cache():
+    """Shared on-disk MP3 cache for all sessions in this process"""
+    return AudioCache()
+
+@st.cache_resource
+def get_blob_store():
+    """Disk-backed store for per-session results, shared by all sessions in this process"""
+    return BlobStore()
+
+def store_artifact(name, data):
+    """Move a result out of session memory, returning the handle to keep in session state"""
+    return get_blob_store().put(st.session_state.session_id, name, data)
+
+def load_text(handle):
+    """Text of a stored result, or None if it was evicted"""
+    try:
+        return get_blob_store().read_text(handle)
+    except FileNotFoundError:
+        return None
+
+@contextmanager
+def open_artifact(handle):
+    """Memory-mapped file object for a stored result, or None if there's no handle or it was evicted
+
+    The mapping is closed when the with block ends, so pass it to every
+    widget that needs it inside the block.
+    """
+    reader = None
+    if handle is not None:
+        try:
+            reader = get_blob_store().open(handle)
+        except FileNotFoundError:
+            pass
+    try:
+        yield reader
+    finally:
+        if reader is not None:
+            reader.close()
+
+def split_stream_block(text, block_chars=STREAM_BLOCK_CHARS):
+    """Split streamed text into (finished block, growing tail) once it passes block_chars"""
+    if len(text) <= block_chars:
+        return "", text
+    # Prefer a line break, then a word break, so the tail never starts mid-word
+    cut = text.rfind("\n") + 1 or max(text.rfind(" "), text.rfind("\t")) + 1 or len(text)
+    return text[:cut].rstrip("\n"), text[cut:]
+
+def get_model(api_key, model_name=DEFAULT_MODEL_NAME):
+    """Reuse the configured Gemini model across reruns and sessions via the client pool"""
+    return create_model(api_key, model_name)
+
+@st.cache_resource
+def get_extraction_cache():
+    """Extracted text shared across reruns and sessions, keyed by content hash, type and pages"""
+    return ExtractionCache()
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def count_file_pages(file_hash, file_type, _file_bytes):
+    """Page count for paged uploads, computed once per content hash"""
+    # _file_bytes is excluded from Streamlit's cache key, the hash stands in for it
+    return count_pages(_file_bytes, file_type)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def count_chunks(extraction_key, _text):
+    """Number of translation chunks for an extracted file, computed once per extraction"""
+    return len(chunk_text(_text))
 
 # Configure page
 st.set_page_config(
@@ -111,12 +118,19 @@ st.title("🌍 Universal Text Translator & Speech Converter")
 st.markdown("*Translate text into multiple languages and convert to speech*")
 
 # Initialize session state
-if 'translated_text' not in st.session_state:
-    st.session_state.translated_text = ""
+# Results are kept in the blob store; session state only holds their handles
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+if 'translation_blob' not in st.session_state:
+    st.session_state.translation_blob = None
+if 'translated_table' not in st.session_state:
+    st.session_state.translated_table = None
+if 'multi_results' not in st.session_state:
+    st.session_state.multi_results = None
 if 'current_language' not in st.session_state:
     st.session_state.current_language = ""
-if 'audio_data' not in st.session_state:
-    st.session_state.audio_data = None
+if 'audio_blob' not in st.session_state:
+    st.session_state.audio_blob = None
 if 'translation_count' not in st.session_state:
     st.session_state.translation_count = 0
 if 'audio_count' not in st.session_state:
@@ -129,6 +143,13 @@ if 'translation_attempts' not in st.session_state:
     st.session_state.translation_attempts = 0
 if 'audio_attempts' not in st.session_state:
     st.session_state.audio_attempts = 0
+if 'processed_files' not in st.session_state:
+    st.session_state.processed_files = set()
+if 'cache_stats' not in st.session_state:
+    st.session_state.cache_stats = {"cache_hits": 0, "cache_misses": 0}
+
+# Keep this session's stored results from being evicted as idle
+get_blob_store().touch(st.session_state.session_id)
 
 # Sidebar for API key with enhanced validation
 with st.sidebar:
@@ -140,7 +161,8 @@ with st.sidebar:
         is_valid, error_msg = validate_api_key(api_key)
         if is_valid:
             try:
-                genai.configure(api_key=api_key)
+                # Configures the SDK once per key rather than on every rerun
+                client_pool.configure(api_key)
                 st.success("✅ API Key configured!")
             except Exception as e:
                 st.error(f"❌ API key configuration failed: {str(e)}")
@@ -174,13 +196,69 @@ with st.sidebar:
             audio_success_rate = (st.session_state.audio_count / st.session_state.audio_attempts) * 100
             st.metric("🔊 Audio Success", f"{audio_success_rate:.0f}%")
         
+        # Translation cache counters (per chunk)
+        cache_hits = st.session_state.cache_stats["cache_hits"]
+        cache_misses = st.session_state.cache_stats["cache_misses"]
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("💾 Cache Hits", cache_hits)
+        with col2:
+            st.metric("🌐 Cache Misses", cache_misses)
+        if cache_hits + cache_misses > 0:
+            st.caption(f"Cache hit rate: {cache_hits / (cache_hits + cache_misses) * 100:.0f}% this session")
+        
+        # Shared Gemini rate limiter (applies to every session in this server process)
+        with st.expander("🚦 Rate Limits"):
+            scheduler = get_scheduler()
+            requests_per_minute = st.number_input("Requests per minute", min_value=1, value=scheduler.requests_per_minute, step=10)
+            tokens_per_minute = st.number_input("Tokens per minute", min_value=1000, value=scheduler.tokens_per_minute, step=10000)
+            if (requests_per_minute, tokens_per_minute) != (scheduler.requests_per_minute, scheduler.tokens_per_minute):
+                scheduler.configure(requests_per_minute, tokens_per_minute)
+            scheduler_stats = scheduler.stats()
+            st.caption(
+                f"Concurrency limit: {scheduler_stats['concurrency_limit']} • "
+                f"In flight: {scheduler_stats['active']} • "
+                f"Rate-limited responses: {scheduler_stats['rate_limited']}"
+                + (" • cooling down" if scheduler_stats["cooling_down"] else "")
+            )
+        
+        # Stage timings shared by every session in this server process
+        with st.expander("📈 Performance"):
+            metrics = get_metrics()
+            metrics.profiling = st.checkbox(
+                "Profile translations and extraction", value=metrics.profiling,
+                help="Capture a cProfile report for each run; adds overhead, so leave off in production"
+            )
+            stage_summary = metrics.summary()
+            if stage_summary:
+                st.dataframe(stage_summary)
+            else:
+                st.caption("No timings recorded yet.")
+            for cache_name, hit_rate in sorted(metrics.cache_hit_rates().items()):
+                st.caption(f"{cache_name.capitalize()} cache hit rate: {hit_rate * 100:.0f}%")
+            stored_bytes, stored_sessions = get_blob_store().usage()
+            st.caption(f"Stored results: {stored_bytes / 1024 / 1024:.1f} MB across {stored_sessions} sessions")
+            col1, col2 = st.columns(2)
+            with col1:
+                st.download_button("⬇️ JSON", metrics.to_json(), file_name="metrics.json", mime="application/json")
+            with col2:
+                st.download_button("⬇️ Prometheus", metrics.to_prometheus(), file_name="metrics.prom", mime="text/plain")
+            for profile in metrics.profiles()[:3]:
+                st.caption(f"{profile['name']} • {profile['seconds']:.2f}s • {datetime.fromtimestamp(profile['at']):%H:%M:%S}")
+                st.code(profile["report"], language=None)
+            if st.button("Clear timings"):
+                metrics.reset()
+                st.rerun()
+        
         # Reset statistics button
         if st.button("🔄 Reset Statistics", help="Reset all session counters"):
             st.session_state.translation_count = 0
             st.session_state.audio_count = 0
             st.session_state.file_count = 0
+            st.session_state.processed_files = set()
             st.session_state.translation_attempts = 0
             st.session_state.audio_attempts = 0
+            st.session_state.cache_stats = {"cache_hits": 0, "cache_misses": 0}
             st.session_state.session_start = datetime.now()
             st.success("✅ Statistics reset!")
             st.rerun()
@@ -189,13 +267,13 @@ with st.sidebar:
         with st.expander("💡 Usage Tips & Help"):
             st.markdown("""
             **🎯 For Best Results:**
-            - Keep text under 1000 characters for faster processing
+            - Long documents are split into chunks and translated in parallel
             - Use clear, simple language for better translations
             - PDF files work best when they contain selectable text
             - Try different languages to compare translation quality
             
             **🔧 Troubleshooting:**
-            - If translation fails, try shorter text segments
+            - If translation fails, try again - failed chunks are retried automatically
             - For file uploads, ensure files aren't password-protected
             - Audio generation works best with shorter translated text
             - Some languages may have limited TTS voice quality
@@ -205,7 +283,7 @@ with st.sidebar:
             - **File Types**: TXT, PDF, CSV, Excel, Word documents  
             - **Audio**: MP3 downloads with normal/slow speed options
             - **File Size**: Up to 10MB per file
-            - **Text Length**: Up to 5000 characters per translation
+            - **Text Length**: Up to 1,000,000 characters per translation (chunked)
             
             **🌟 Pro Tips:**
             - Use the language detection feature to identify input text
@@ -225,16 +303,22 @@ if api_key and validate_api_key(api_key)[0]:
     )
     
     input_text = ""
+    table_source = None
+    line_mode = False
     
     if input_method == "✍️ Type text directly":
         # Direct text input
         input_text = st.text_area("Enter text to translate:", height=150, placeholder="Type your text here...")
+        line_mode = st.checkbox(
+            "📋 Translate each line separately",
+            help="For UI strings, subtitles or lists: short lines are packed together into a few requests"
+        )
         
         # Show character count for direct input
         if input_text:
             char_count = len(input_text)
-            if char_count > 4000:
-                st.warning(f"⚠️ {char_count:,} characters (approaching 5000 limit)")
+            if char_count > MAX_TEXT_LENGTH * 0.8:
+                st.warning(f"⚠️ {char_count:,} characters (approaching {MAX_TEXT_LENGTH:,} limit)")
             else:
                 st.info(f"📝 {char_count:,} characters")
     
@@ -264,45 +348,47 @@ if api_key and validate_api_key(api_key)[0]:
                 st.error(f"❌ {size_error}")
                 input_text = ""
             else:
-                # Extract text based on file type
+                # Extract text based on file type (memoized by content hash across reruns)
                 with st.spinner("Extracting text from file..."):
                     try:
-                        if uploaded_file.type == "text/plain":
-                            # Handle TXT files
-                            input_text = str(uploaded_file.read(), "utf-8")
-                            
-                        elif uploaded_file.type == "application/pdf":
-                            # Handle PDF files
-                            pdf_reader = PyPDF2.PdfReader(uploaded_file)
-                            text_parts = []
-                            for page_num, page in enumerate(pdf_reader.pages):
-                                try:
-                                    text_parts.append(page.extract_text())
-                                except:
-                                    st.warning(f"Could not read page {page_num + 1}")
-                            input_text = "\n".join(text_parts)
-                            
-                        elif uploaded_file.type == "text/csv":
-                            # Handle CSV files
-                            df = pd.read_csv(uploaded_file)
-                            input_text = df.to_string()
-                            
-                        elif uploaded_file.type in ["application/vnd.ms-excel", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"]:
-                            # Handle Excel files
-                            df = pd.read_excel(uploaded_file)
-                            input_text = df.to_string()
-                            
-                        elif uploaded_file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-                            # Handle Word documents
-                            doc = docx.Document(uploaded_file)
-                            text_parts = []
-                            for paragraph in doc.paragraphs:
-                                text_parts.append(paragraph.text)
-                            input_text = "\n".join(text_parts)
+                        file_bytes = uploaded_file.getvalue()
+                        file_hash = file_content_hash(file_bytes)
+                        
+                        # Page selection for paged formats, only the selected pages are parsed
+                        pages = None
+                        page_spec = ""
+                        if supports_page_ranges(uploaded_file.type):
+                            page_count = count_file_pages(file_hash, uploaded_file.type, file_bytes)
+                            page_spec = st.text_input(
+                                f"Pages to extract (document has {page_count} pages):",
+                                placeholder="All pages, or e.g. 1-5, 8, 10-",
+                                help="Leave empty to extract every page"
+                            ).strip()
+                            pages = parse_page_ranges(page_spec, page_count)
                         
+                        extraction_key = (file_hash, uploaded_file.type, page_spec)
+                        cached_extraction = get_extraction_cache().get(extraction_key)
+                        if cached_extraction is not None:
+                            input_text, extraction_warnings = cached_extraction
                         else:
-                            st.error(f"Unsupported file type: {uploaded_file.type}")
-                            input_text = ""
+                            # Show the first page/block as soon as it is extracted
+                            first_block_placeholder = st.empty()
+                            extraction_warnings = []
+                            blocks = []
+                            preview_shown = False
+                            with get_metrics().profile(f"extract {uploaded_file.name}"):
+                                for block in iter_text(file_bytes, uploaded_file.type, pages=pages, warnings=extraction_warnings):
+                                    if not preview_shown and block.strip():
+                                        first_block_placeholder.text(block[:500])
+                                        preview_shown = True
+                                    blocks.append(block)
+                            first_block_placeholder.empty()
+                            input_text = "\n".join(blocks)
+                            del blocks
+                            get_extraction_cache().put(extraction_key, input_text, extraction_warnings)
+                        
+                        for warning in extraction_warnings:
+                            st.warning(warning)
                         
                         # Show extraction results
                         if input_text.strip():
@@ -317,11 +403,24 @@ if api_key and validate_api_key(api_key)[0]:
                                 st.text_area("Extracted text:", input_text, height=150, key="preview")
                             
                             # Warning for very long texts
-                            if char_count > 5000:
-                                st.warning("⚠️ Text is quite long. Translation may take more time and consume more API credits.")
+                            if char_count > MAX_TEXT_LENGTH:
+                                st.warning(f"⚠️ Text exceeds the {MAX_TEXT_LENGTH:,} character limit and cannot be translated.")
+                            elif char_count > 5000:
+                                chunk_count = count_chunks(extraction_key, input_text)
+                                st.warning(f"⚠️ Text is quite long. It will be translated in {chunk_count} chunks and consume more API credits.")
+                            
+                            # Update file processing counter only for genuinely new files (Step 10.4)
+                            if file_hash not in st.session_state.processed_files:
+                                st.session_state.processed_files.add(file_hash)
+                                st.session_state.file_count += 1
                             
-                            # Update file processing counter (Step 10.4)
-                            st.session_state.file_count += 1
+                            # Spreadsheets can be translated cell by cell instead of as flattened text
+                            if uploaded_file.type in TABLE_TYPES and st.checkbox(
+                                "📊 Translate as table",
+                                value=True,
+                                help="Keep rows and columns, skip numeric/date columns and translate each distinct value once"
+                            ):
+                                table_source = {"bytes": file_bytes, "type": uploaded_file.type, "name": uploaded_file.name}
                         else:
                             st.error("❌ No text content found in the file")
                             
@@ -330,10 +429,163 @@ if api_key and validate_api_key(api_key)[0]:
                         input_text = ""
 
     # Language selection
-    target_language = st.selectbox("Select target language:", list(SUPPORTED_LANGUAGES.keys()))
+    multi_target = st.checkbox(
+        "🌐 Translate into multiple languages",
+        help="Translate the text into several languages at once (tables are flattened to text in this mode)"
+    )
+    stream_output = False
+    speak_while_translating = False
+    use_memory = False
+    
+    if multi_target:
+        target_languages = st.multiselect("Select target languages:", list(SUPPORTED_LANGUAGES.keys()))
+        target_language = target_languages[0] if target_languages else None
+        col1, col2 = st.columns(2)
+        with col1:
+            max_concurrency = st.slider("Concurrent translations:", 1, len(SUPPORTED_LANGUAGES), DEFAULT_CONCURRENCY)
+        with col2:
+            batch_audio = st.checkbox("🎵 Also generate audio for each language")
+    else:
+        target_language = st.selectbox("Select target language:", list(SUPPORTED_LANGUAGES.keys()))
+        
+        # Streaming options
+        col1, col2 = st.columns(2)
+        with col1:
+            stream_output = st.checkbox("⚡ Stream translation as it arrives", help="Show translated text while Gemini is still writing it")
+        with col2:
+            speak_while_translating = st.checkbox(
+                "🔊 Speak while translating",
+                disabled=not stream_output,
+                help="Synthesize each finished sentence right away, so audio is ready when the translation is"
+            )
+        use_memory = st.checkbox(
+            "🧠 Use translation memory",
+            disabled=stream_output,
+            help="Reuse earlier sentence translations: exact matches skip the API, near matches are sent as hints"
+        )
     
     # Translate button with enhanced validation
-    if st.button("🔄 Translate", type="primary"):
+    translate_clicked = st.button("🔄 Translate", type="primary")
+    if translate_clicked and multi_target:
+        # Update translation attempts counter (Step 10.4)
+        st.session_state.translation_attempts += len(target_languages)
+        
+        is_valid, validation_error = validate_text_length(input_text)
+        if not target_languages:
+            st.error("❌ Please select at least one target language")
+        elif not is_valid:
+            st.error(f"❌ {validation_error}")
+        else:
+            # Show each translation as soon as its language finishes
+            live_placeholder = st.empty()
+            live_area = live_placeholder.container()
+            
+            def show_translation(language, result, error):
+                if error is not None:
+                    live_area.error(f"❌ {language}: {translation_error_message(str(error))}")
+                    return
+                with live_area.expander(f"✅ {language} ({SUPPORTED_LANGUAGES[language]['native_name']})"):
+                    st.text_area("Translated text:", result, height=100, key=f"live_multi_{language}")
+            
+            with st.spinner(f"Translating into {len(target_languages)} languages..."):
+                translations, errors = translate_to_many(
+                    get_model(api_key), input_text, target_languages,
+                    max_concurrency=max_concurrency,
+                    cache=get_translation_cache(),
+                    on_result=show_translation
+                )
+            # Update successful translation counter (Step 10.4)
+            st.session_state.translation_count += len(translations)
+            
+            audio = {}
+            if batch_audio and translations:
+                # List each language's audio as it finishes, below the translations
+                audio_status = live_area.empty()
+                finished = []
+                
+                def show_audio(language, result, error):
+                    finished.append(f"🔊 {language}" if error is None else f"❌ {language}: {str(error)}")
+                    audio_status.markdown("  \n".join(finished))
+                
+                st.session_state.audio_attempts += len(translations)
+                with st.spinner(f"Generating audio for {len(translations)} languages..."):
+                    audio, audio_errors = synthesize_many(
+                        translations,
+                        {language: SUPPORTED_LANGUAGES[language]["code"] for language in translations},
+                        slow=st.session_state.get("speech_speed", "Normal") == "Slow",
+                        max_concurrency=max_concurrency,
+                        audio_cache=get_audio_cache(),
+                        on_result=show_audio
+                    )
+                st.session_state.audio_count += len(audio)
+                for language, error in audio_errors.items():
+                    st.error(f"❌ Audio generation failed for {language}: {str(error)}")
+            live_placeholder.empty()
+            
+            # Keep results in source selection order
+            ordered = {language: translations[language] for language in target_languages if language in translations}
+            st.session_state.multi_results = {
+                "translations": {
+                    language: store_artifact(f"multi_{SUPPORTED_LANGUAGES[language]['code']}.txt", text)
+                    for language, text in ordered.items()
+                },
+                "errors": {language: translation_error_message(str(error)) for language, error in errors.items()},
+                "audio": {
+                    language: store_artifact(f"multi_{SUPPORTED_LANGUAGES[language]['code']}.mp3", audio_bytes)
+                    for language, audio_bytes in audio.items()
+                },
+                "zip": store_artifact("multi.zip", build_zip(ordered, audio)) if ordered else None
+            }
+            del translations, audio
+            if ordered:
+                st.success(f"✅ Translated into {len(ordered)} of {len(target_languages)} languages!")
+    
+    elif translate_clicked and table_source is not None:
+        # Update translation attempts counter (Step 10.4)
+        st.session_state.translation_attempts += 1
+        
+        with st.spinner(f"Translating table to {target_language}..."):
+            progress_placeholder = st.empty()
+            
+            def show_table_progress(done, total):
+                progress_placeholder.progress(done / total, text=f"Translated {done} of {total} batches")
+            
+            try:
+                table_stats = {}
+                df = load_table(table_source["bytes"], table_source["type"])
+                translated_df, translated_columns = translate_table(
+                    get_model(api_key), df, target_language,
+                    cache=get_translation_cache(),
+                    progress_callback=show_table_progress,
+                    stats=table_stats
+                )
+                st.session_state.cache_stats["cache_hits"] += table_stats.get("cache_hits", 0)
+                st.session_state.cache_stats["cache_misses"] += table_stats.get("cache_misses", 0)
+                
+                if not translated_columns:
+                    st.warning("⚠️ No text columns found to translate.")
+                
+                # Keep a preview in session state and the downloads in the blob store
+                safe_name = sanitize_filename(table_source["name"].rsplit(".", 1)[0])
+                st.session_state.translated_table = {
+                    "df": translated_df.head(TABLE_PREVIEW_ROWS),
+                    "rows": len(translated_df),
+                    "csv": store_artifact("table.csv", to_csv_bytes(translated_df)),
+                    "xlsx": store_artifact("table.xlsx", to_excel_bytes(translated_df)),
+                    "name": f"{safe_name}_{sanitize_filename(target_language)}",
+                    "language": target_language
+                }
+                # Update successful translation counter (Step 10.4)
+                st.session_state.translation_count += 1
+                st.success(
+                    f"✅ Table translated! {table_stats.get('unique_values', 0):,} unique values "
+                    f"from {table_stats.get('cells', 0):,} cells in {table_stats.get('requests', 0)} requests"
+                )
+            
+            except Exception as e:
+                st.error(translation_error_message(str(e)))
+    
+    elif translate_clicked:
         # Update translation attempts counter (Step 10.4)
         st.session_state.translation_attempts += 1
         
@@ -346,39 +598,184 @@ if api_key and validate_api_key(api_key)[0]:
             # Show input language detection
             language_info = detect_language_info(input_text)
             st.info(f"🔍 Input text analysis: {language_info}")
+            if is_same_language(input_text, target_language):
+                st.info(f"ℹ️ Input already appears to be {target_language}. It will still be sent for translation.")
             
             with st.spinner(f"Translating to {target_language}..."):
+                progress_placeholder = st.empty()
+                
+                def show_progress(done, total):
+                    if total > 1:
+                        progress_placeholder.progress(done / total, text=f"Translated {done} of {total} chunks")
+                
+                stream_placeholder = st.empty()
+                audio_placeholder = st.empty()
+                pipeline = None
+                language_code = SUPPORTED_LANGUAGES[target_language]["code"]
+                slow_speech = st.session_state.get("speech_speed", "Normal") == "Slow"
+                if stream_output and speak_while_translating:
+                    # Update audio attempts counter (Step 10.4)
+                    st.session_state.audio_attempts += 1
+                    pipeline = SentencePipeline(language_code, slow=slow_speech)
+                
                 try:
-                    model = genai.GenerativeModel('gemini-1.5-flash')
-                    prompt = f"Translate this to {target_language}, return only the translation:\n{input_text}"
-                    response = model.generate_content(prompt)
+                    model = get_model(api_key)
+                    with get_metrics().profile(f"translate to {target_language}"):
+                        if stream_output:
+                            # Render fragments as plain text as they arrive and hand finished sentences to TTS;
+                            # finished blocks are written once and only the growing tail is re-sent
+                            stream_area = stream_placeholder.container()
+                            finished_area = stream_area.container()
+                            live_area = stream_area.empty()
+                            streamed = []
+                            tail = ""
+                            preview_shown = False
+                            for fragment in stream_document(
+                                model, input_text, target_language,
+                                cache=get_translation_cache(),
+                                stats=st.session_state.cache_stats
+                            ):
+                                streamed.append(fragment)
+                                block, tail = split_stream_block(tail + fragment)
+                                if block:
+                                    finished_area.text(block)
+                                live_area.text(tail)
+                                if pipeline is not None:
+                                    pipeline.feed(fragment)
+                                    first_segment = None if preview_shown else pipeline.first_segment()
+                                    if first_segment is not None:
+                                        audio_placeholder.audio(first_segment, format='audio/mp3')
+                                        preview_shown = True
+                            translated = "".join(streamed).strip()
+                            stream_placeholder.empty()
+                            if not translated:
+                                raise ValueError("Translation returned empty result")
+                        elif use_memory:
+                            # Only sentences the memory hasn't seen cost an API call
+                            memory_stats = {}
+                            translated = translate_with_memory(
+                                model, input_text, target_language, get_translation_memory(),
+                                cache=get_translation_cache(),
+                                stats=memory_stats
+                            )
+                            st.session_state.cache_stats["cache_hits"] += memory_stats.get("cache_hits", 0)
+                            st.session_state.cache_stats["cache_misses"] += memory_stats.get("cache_misses", 0)
+                            st.info(
+                                f"🧠 Translation memory: {memory_stats['memory_exact']} sentences reused, "
+                                f"{memory_stats['memory_fuzzy']} near matches used as hints, "
+                                f"{memory_stats['memory_new']} new"
+                            )
+                            if memory_stats["memory_fuzzy_matches"]:
+                                with st.expander("🔎 Near matches to review"):
+                                    for sentence, score in memory_stats["memory_fuzzy_matches"]:
+                                        st.markdown(f"- **{score:.0%}** {sentence}")
+                        elif line_mode:
+                            # Many short lines are packed into a few requests and unpacked line by line
+                            translated = "\n".join(translate_segments(
+                                model, input_text.splitlines(), target_language,
+                                cache=get_translation_cache(),
+                                stats=st.session_state.cache_stats
+                            )).strip()
+                        else:
+                            # Long inputs are chunked at sentence/paragraph boundaries and translated concurrently;
+                            # chunks already in the translation cache skip the API call
+                            translated = translate_document(
+                                model, input_text, target_language,
+                                progress_callback=show_progress,
+                                cache=get_translation_cache(),
+                                stats=st.session_state.cache_stats
+                            )
+                    
+                    # Store translation in the blob store, keeping only its handle in session state
+                    st.session_state.translation_blob = store_artifact("translation.txt", translated)
+                    st.session_state.current_language = target_language
+                    # Update successful translation counter (Step 10.4)
+                    st.session_state.translation_count += 1
+                    st.success("✅ Translation completed!")
                     
-                    # Validate response
-                    if response.text and response.text.strip():
-                        # Store translation in session state
-                        st.session_state.translated_text = response.text.strip()
-                        st.session_state.current_language = target_language
-                        # Update successful translation counter (Step 10.4)
-                        st.session_state.translation_count += 1
-                        st.success("✅ Translation completed!")
-                    else:
-                        st.error("❌ Translation returned empty result. Please try again.")
+                    if pipeline is not None:
+                        try:
+                            audio_bytes = pipeline.finish()
+                            audio_placeholder.empty()
+                            get_audio_cache().put(translated, language_code, slow_speech, audio_bytes)
+                            st.session_state.audio_blob = store_artifact("audio.mp3", audio_bytes)
+                            st.session_state.audio_language = target_language
+                            # Update successful audio counter (Step 10.4)
+                            st.session_state.audio_count += 1
+                        except Exception as e:
+                            st.error(f"❌ Audio generation failed: {str(e)}")
                                         
                 except Exception as e:
-                    error_msg = str(e)
-                    if "quota" in error_msg.lower():
-                        st.error("❌ API quota exceeded. Please check your Gemini API usage limits.")
-                    elif "invalid" in error_msg.lower():
-                        st.error("❌ Invalid API key. Please check your Gemini API key.")
-                    elif "network" in error_msg.lower() or "connection" in error_msg.lower():
-                        st.error("❌ Network error. Please check your internet connection and try again.")
-                    else:
-                        st.error(f"❌ Translation failed: {error_msg}")
+                    if pipeline is not None:
+                        pipeline.cancel()
+                    st.error(translation_error_message(str(e)))
+
+    # Show multi-language results if we have them
+    if st.session_state.multi_results is not None:
+        multi_results = st.session_state.multi_results
+        st.subheader("🌐 Multi-Language Results")
+        for language, error_message in multi_results["errors"].items():
+            st.error(f"{language}: {error_message}")
+        for language, handle in multi_results["translations"].items():
+            with st.expander(f"{language} ({SUPPORTED_LANGUAGES[language]['native_name']})"):
+                translated = load_text(handle)
+                if translated is None:
+                    st.info(EXPIRED_MESSAGE)
+                    continue
+                st.text_area("Translated text:", translated, height=100, key=f"multi_{language}")
+                with open_artifact(multi_results["audio"].get(language)) as audio_file:
+                    if audio_file is not None:
+                        st.audio(audio_file, format='audio/mp3')
+        with open_artifact(multi_results["zip"]) as zip_file:
+            if zip_file is not None:
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                st.download_button(
+                    label="⬇️ Download All (ZIP)",
+                    data=zip_file,
+                    file_name=f"translations_{timestamp}.zip",
+                    mime="application/zip",
+                    help="Translated text and any generated MP3s for every language"
+                )
+
+    # Show translated table if we have one
+    if st.session_state.translated_table is not None:
+        translated_table = st.session_state.translated_table
+        st.subheader(f"Translated Table ({translated_table['language']}):")
+        st.dataframe(translated_table["df"])
+        if translated_table["rows"] > TABLE_PREVIEW_ROWS:
+            st.caption(f"Showing the first {TABLE_PREVIEW_ROWS:,} of {translated_table['rows']:,} rows; downloads contain every row.")
+        
+        with open_artifact(translated_table["csv"]) as csv_file, open_artifact(translated_table["xlsx"]) as xlsx_file:
+            if csv_file is None or xlsx_file is None:
+                st.info(EXPIRED_MESSAGE)
+            else:
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.download_button(
+                        label="⬇️ Download CSV",
+                        data=csv_file,
+                        file_name=f"{translated_table['name']}.csv",
+                        mime="text/csv"
+                    )
+                with col2:
+                    st.download_button(
+                        label="⬇️ Download Excel",
+                        data=xlsx_file,
+                        file_name=f"{translated_table['name']}.xlsx",
+                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                    )
 
     # Show translation result if we have one
-    if st.session_state.translated_text:
+    translated_text = None
+    if st.session_state.translation_blob is not None:
+        translated_text = load_text(st.session_state.translation_blob)
+        if translated_text is None:
+            st.info(EXPIRED_MESSAGE)
+            st.session_state.translation_blob = None
+            st.session_state.audio_blob = None
+    if translated_text:
         st.subheader(f"Translation Result ({st.session_state.current_language}):")
-        st.text_area("Translated text:", st.session_state.translated_text, height=100, key="translation_display")
+        st.text_area("Translated text:", translated_text, height=100, key="translation_display")
 
         # TTS SECTION - Persistent outside translation button
         st.subheader("🔊 Text-to-Speech")
@@ -387,7 +784,7 @@ if api_key and validate_api_key(api_key)[0]:
 
         with col1:
             # Speech speed option
-            speech_speed = st.radio("Speech speed:", ["Normal", "Slow"])
+            speech_speed = st.radio("Speech speed:", ["Normal", "Slow"], key="speech_speed")
             slow_speech = speech_speed == "Slow"
 
         with col2:
@@ -400,16 +797,28 @@ if api_key and validate_api_key(api_key)[0]:
                 
                 with st.spinner("Generating audio..."):
                     try:
-                        # Create TTS object
-                        tts = gTTS(text=st.session_state.translated_text, lang=language_code, slow=slow_speech)
+                        audio_cache = get_audio_cache()
+                        audio_bytes = audio_cache.get(translated_text, language_code, slow_speech)
                         
-                        # Create audio buffer
-                        audio_buffer = io.BytesIO()
-                        tts.write_to_fp(audio_buffer)
-                        audio_buffer.seek(0)
+                        if audio_bytes is None:
+                            # Play the first sentence while the remaining segments synthesize in parallel
+                            preview_placeholder = st.empty()
+                            
+                            def play_first_segment(segment_bytes):
+                                preview_placeholder.audio(segment_bytes, format='audio/mp3')
+                            
+                            audio_bytes = synthesize_speech(
+                                translated_text, language_code, slow_speech,
+                                on_first_segment=play_first_segment
+                            )
+                            preview_placeholder.empty()
+                            
+                            # Share with other sessions and future reruns
+                            audio_cache.put(translated_text, language_code, slow_speech, audio_bytes)
                         
-                        # Store in session state
-                        st.session_state.audio_data = audio_buffer.getvalue()
+                        # Store in the blob store, keeping only its handle in session state
+                        st.session_state.audio_blob = store_artifact("audio.mp3", audio_bytes)
+                        del audio_bytes
                         st.session_state.audio_language = st.session_state.current_language
                         # Update successful audio counter (Step 10.4)
                         st.session_state.audio_count += 1
@@ -426,24 +835,25 @@ if api_key and validate_api_key(api_key)[0]:
                             st.error(f"❌ Audio generation failed: {error_msg}")
 
         # Audio playback section - Shows when audio is available
-        if st.session_state.audio_data is not None:
-            st.subheader("🎧 Audio Playback")
-            
-            # Play audio
-            st.audio(st.session_state.audio_data, format='audio/mp3')
-            
-            # Download button with sanitized filename
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            safe_language = sanitize_filename(st.session_state.current_language)
-            filename = f"translation_{safe_language}_{timestamp}.mp3"
-            
-            st.download_button(
-                label="⬇️ Download Audio File",
-                data=st.session_state.audio_data,
-                file_name=filename,
-                mime="audio/mp3",
-                help="Download the generated audio as MP3 file"
-            )
+        with open_artifact(st.session_state.audio_blob) as audio_file:
+            if audio_file is not None:
+                st.subheader("🎧 Audio Playback")
+                
+                # Play and download from the same memory-mapped file; both read it during the call
+                st.audio(audio_file, format='audio/mp3')
+                
+                # Download button with sanitized filename
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                safe_language = sanitize_filename(st.session_state.current_language)
+                filename = f"translation_{safe_language}_{timestamp}.mp3"
+                
+                st.download_button(
+                    label="⬇️ Download Audio File",
+                    data=audio_file,
+                    file_name=filename,
+                    mime="audio/mp3",
+                    help="Download the generated audio as MP3 file"
+                )
 
 else:
     st.warning("⚠️ Please enter your Gemini API key in the sidebar to get started.")
@@ -0,0 +1,102 @@
+# audio_cache.py - Size-capped, LRU-evicted on-disk cache for synthesized MP3 audio
+import hashlib
+import os
+import tempfile
+import threading
+
+from metrics import get_metrics
+
+# Cache configuration
+AUDIO_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "audio")
+MAX_CACHE_BYTES = 500 * 1024 * 1024   # 500 MB across all sessions
+
+
+def make_audio_key(text, language_code, slow):
+    """Build a content hash from the three inputs that determine the audio"""
+    payload = "\0".join([text, language_code, "slow" if slow else "normal"])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """MP3 store shared across sessions; file mtime doubles as the LRU clock"""
+
+    def __init__(self, cache_dir=AUDIO_CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._evict_lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        """Location of the MP3 file for a cache key"""
+        return os.path.join(self.cache_dir, f"{key}.mp3")
+
+    def get(self, text, language_code, slow):
+        """Return cached MP3 bytes or None"""
+        path = self._path(make_audio_key(text, language_code, slow))
+        try:
+            with open(path, "rb") as audio_file:
+                audio_bytes = audio_file.read()
+            # Mark as recently used
+            os.utime(path, None)
+        except FileNotFoundError:
+            # Missing, or evicted by another session between open and utime
+            get_metrics().count_cache("audio", False)
+            return None
+        get_metrics().count_cache("audio", True)
+        return audio_bytes
+
+    def put(self, text, language_code, slow, audio_bytes):
+        """Store MP3 bytes atomically, then evict old entries over the size cap"""
+        path = self._path(make_audio_key(text, language_code, slow))
+        # Write to a temp file in the same directory and rename over the target, so
+        # concurrent sessions never observe a partially written MP3
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                temp_file.write(audio_bytes)
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        self._evict()
+
+    def _evict(self):
+        """Delete least recently used files until the cache fits in max_bytes"""
+        with self._evict_lock:
+            entries = []
+            total_bytes = 0
+            for entry in os.scandir(self.cache_dir):
+                if not entry.name.endswith(".mp3"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total_bytes += stat.st_size
+
+            entries.sort()
+            for _, size, path in entries:
+                if total_bytes <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total_bytes -= size
+
+    def size_bytes(self):
+        """Total size of cached audio on disk"""
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".mp3"):
+                try:
+                    total += entry.stat().st_size
+                except FileNotFoundError:
+                    pass
+        return total
@@ -0,0 +1,345 @@
+# batch_runner.py - Headless batch translation/TTS runner with resumable checkpoints
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from audio_cache import AudioCache
+from file_extraction import ExtractionCache
+from metrics import get_metrics
+from pipeline import (SUPPORTED_LANGUAGES, create_model, extract_file, guess_file_type, synthesize_text,
+                      translate_text)
+from translation_cache import TranslationCache
+from translation_engine import DEFAULT_MODEL_NAME
+from translation_memory import TranslationMemory
+from validation import validate_text_length
+
+# Runner configuration
+DEFAULT_CONCURRENCY = 4        # Jobs in flight; Gemini calls inside each job are also bounded by the scheduler
+CHECKPOINT_FILE = ".checkpoint.jsonl"
+RESULTS_FILE = "results.jsonl"
+
+# Characters that can't appear in a job id: path separators, the job id's ':' and control characters
+_UNSAFE_ID_CHARS = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+
+
+def safe_id(value):
+    """Job id usable as an output file name inside the output directory"""
+    safe = _UNSAFE_ID_CHARS.sub("_", str(value)).strip().lstrip(".")
+    if not safe:
+        raise ValueError(f"invalid id {value!r}")
+    return safe
+
+
+def load_jobs(input_path, languages, audio=False, page_spec=None):
+    """Expand a directory or JSONL manifest into one job per (source, language)
+
+    Manifest lines look like {"id": ..., "path": ... or "text": ...,
+    "languages": [...], "audio": bool, "pages": "1-3"}; missing fields fall
+    back to the command-line defaults. Ids default to the source's file name,
+    extension included, and are made safe to use as file names. Raises
+    ValueError on a bad manifest or duplicate ids.
+    """
+    entries = []
+    if os.path.isdir(input_path):
+        for name in sorted(os.listdir(input_path)):
+            path = os.path.join(input_path, name)
+            if os.path.isfile(path) and guess_file_type(path) is not None:
+                entries.append((path, {"id": name, "path": path}))
+    else:
+        base_dir = os.path.dirname(os.path.abspath(input_path))
+        with open(input_path, encoding="utf-8") as manifest:
+            for line_number, line in enumerate(manifest, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError as e:
+                    raise ValueError(f"{input_path}:{line_number}: invalid JSON ({e})") from e
+                if "path" not in entry and "text" not in entry:
+                    raise ValueError(f"{input_path}:{line_number}: entry needs a 'path' or 'text'")
+                if "path" in entry and not os.path.isabs(entry["path"]):
+                    entry["path"] = os.path.join(base_dir, entry["path"])
+                entry.setdefault("id", os.path.basename(entry["path"]) if "path" in entry else f"line{line_number}")
+                entries.append((f"{input_path}:{line_number}", entry))
+
+    jobs = []
+    seen = {}
+    for source, entry in entries:
+        try:
+            entry["id"] = safe_id(entry["id"])
+        except ValueError as e:
+            raise ValueError(f"{source}: {e}") from e
+        if entry["id"] in seen:
+            raise ValueError(f"{source}: duplicate id '{entry['id']}' (also used by {seen[entry['id']]})")
+        seen[entry["id"]] = source
+        for language in entry.get("languages") or languages:
+            if language not in SUPPORTED_LANGUAGES:
+                raise ValueError(f"{entry['id']}: unsupported language '{language}'")
+            jobs.append({
+                "job_id": f"{entry['id']}:{SUPPORTED_LANGUAGES[language]['code']}",
+                "id": entry["id"],
+                "path": entry.get("path"),
+                "text": entry.get("text"),
+                "language": language,
+                "audio": entry.get("audio", audio),
+                "pages": entry.get("pages", page_spec),
+            })
+    return jobs
+
+
+def write_atomic(path, data):
+    """Write bytes to path via a temp file and rename, so readers never see partial output"""
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as temp_file:
+            temp_file.write(data)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+class Checkpoint:
+    """Append-only JSONL log of finished jobs; the last record per job wins"""
+
+    def __init__(self, path):
+        self.path = path
+        self.records = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as log:
+                for line in log:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A run killed mid-write leaves a truncated last line
+                        continue
+                    self.records[record["job_id"]] = record
+        self._file = open(path, "a", encoding="utf-8")
+
+    def is_done(self, job_id):
+        """Whether a job finished successfully in an earlier run"""
+        record = self.records.get(job_id)
+        return record is not None and record["status"] == "done"
+
+    def record(self, entry):
+        """Durably append one job's outcome"""
+        self.records[entry["job_id"]] = entry
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+class BatchRunner:
+    """Run extraction, translation and optional TTS jobs with bounded concurrency"""
+
+    def __init__(self, model, out_dir, concurrency=DEFAULT_CONCURRENCY, slow=False,
+                 cache=None, memory=None, audio_cache=None):
+        self.model = model
+        self.out_dir = out_dir
+        self.concurrency = max(1, concurrency)
+        self.slow = slow
+        self.cache = cache
+        self.memory = memory
+        self.audio_cache = audio_cache
+        self.extraction_cache = ExtractionCache()
+        self._extraction_locks = {}
+        self._in_flight = {}
+        self._locks_guard = threading.Lock()
+        os.makedirs(out_dir, exist_ok=True)
+
+    def _source_text(self, job):
+        """Source text for a job; each file is extracted once however many languages it fans out to"""
+        if job["text"] is not None:
+            return job["text"], []
+        key = (job["path"], job["pages"])
+        with self._locks_guard:
+            lock = self._extraction_locks.setdefault(key, threading.Lock())
+        with lock:
+            cached = self.extraction_cache.get(key)
+            if cached is None:
+                cached = extract_file(job["path"], job["pages"])
+                self.extraction_cache.put(key, *cached)
+        return cached
+
+    def run_job(self, job):
+        """Process one job and write its outputs, returning a result record"""
+        started = time.monotonic()
+        text, warnings = self._source_text(job)
+        is_valid, validation_error = validate_text_length(text)
+        if not is_valid:
+            raise ValueError(validation_error)
+        stats = {}
+        translation = translate_text(self.model, text, job["language"], cache=self.cache,
+                                     memory=self.memory, stats=stats)
+        stem = f"{job['id']}.{SUPPORTED_LANGUAGES[job['language']]['code']}"
+        outputs = [os.path.join(self.out_dir, stem + ".txt")]
+        write_atomic(outputs[0], translation.encode("utf-8"))
+        if job["audio"]:
+            audio_bytes = synthesize_text(translation, job["language"], self.slow, self.audio_cache)
+            outputs.append(os.path.join(self.out_dir, stem + ".mp3"))
+            write_atomic(outputs[1], audio_bytes)
+        return {
+            "job_id": job["job_id"],
+            "status": "done",
+            "outputs": outputs,
+            "characters": len(text),
+            "warnings": warnings,
+            "cache_hits": stats.get("cache_hits", 0),
+            "cache_misses": stats.get("cache_misses", 0),
+            "seconds": round(time.monotonic() - started, 3),
+        }
+
+    def _result(self, future, job):
+        """Result record for a finished future, turning its exception into a 'failed' record"""
+        try:
+            return future.result()
+        except Exception as e:
+            return {"job_id": job["job_id"], "status": "failed", "error": str(e)}
+
+    def run(self, jobs):
+        """Run jobs, yielding result records as they finish
+
+        At most `concurrency` jobs are in flight, so huge manifests are never
+        queued up front. Failures are yielded as records with status 'failed'
+        rather than raised. If the run is interrupted, queued jobs are
+        cancelled without waiting; see drain() for the ones already running.
+        """
+        pending = iter(jobs)
+        self._in_flight = in_flight = {}
+        executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        try:
+            def submit_next():
+                job = next(pending, None)
+                if job is not None:
+                    in_flight[executor.submit(self.run_job, job)] = job
+                return job is not None
+
+            while len(in_flight) < self.concurrency and submit_next():
+                pass
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = in_flight.pop(future)
+                    yield self._result(future, job)
+                    submit_next()
+        finally:
+            # Nothing is left after a complete run; after Ctrl-C, don't block on running jobs here
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def drain(self):
+        """After an interrupted run(), yield result records of the jobs that were still running
+
+        Blocks until each of them finishes, so their work can be checkpointed
+        instead of being paid for again on resume.
+        """
+        in_flight, self._in_flight = self._in_flight, {}
+        for future, job in in_flight.items():
+            if not future.cancel():
+                yield self._result(future, job)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Translate files or a JSONL manifest without the web UI.")
+    parser.add_argument("input", help="directory of .txt/.pdf/.csv/.xlsx/.docx files, or a .jsonl manifest")
+    parser.add_argument("-l", "--languages", nargs="+", default=[], metavar="LANGUAGE",
+                        help=f"target languages, e.g. Spanish French (choices: {', '.join(SUPPORTED_LANGUAGES)})")
+    parser.add_argument("-o", "--out", required=True, help="output directory; also holds the checkpoint")
+    parser.add_argument("--audio", action="store_true", help="also synthesize an MP3 per translation")
+    parser.add_argument("--slow", action="store_true", help="slow speech for generated audio")
+    parser.add_argument("--pages", help="page selection for PDFs, e.g. '1-3, 7'")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="jobs run in parallel")
+    parser.add_argument("--memory", action="store_true", help="reuse the segment-level translation memory")
+    parser.add_argument("--no-cache", action="store_true", help="skip the persistent translation and audio caches")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and rerun every job")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="write stage timings on exit; .prom for Prometheus text, JSON otherwise")
+    parser.add_argument("--model", default=DEFAULT_MODEL_NAME, help="Gemini model name")
+    parser.add_argument("--api-key", help="Gemini API key (default: $GEMINI_API_KEY or $GOOGLE_API_KEY)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    api_key = args.api_key or os.environ.get("GEMINI_API_KEY") or os.environ.get("GOOGLE_API_KEY")
+    if not api_key:
+        print("error: no API key; pass --api-key or set GEMINI_API_KEY", file=sys.stderr)
+        return 2
+    try:
+        jobs = load_jobs(args.input, args.languages, args.audio, args.pages)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    if not jobs:
+        print("error: no jobs; check the input and --languages", file=sys.stderr)
+        return 2
+
+    os.makedirs(args.out, exist_ok=True)
+    checkpoint_path = os.path.join(args.out, CHECKPOINT_FILE)
+    if args.restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    checkpoint = Checkpoint(checkpoint_path)
+    remaining = [job for job in jobs if not checkpoint.is_done(job["job_id"])]
+    skipped = len(jobs) - len(remaining)
+    if skipped:
+        print(f"Resuming: {skipped} of {len(jobs)} jobs already done", file=sys.stderr)
+
+    runner = BatchRunner(
+        create_model(api_key, args.model), args.out, concurrency=args.concurrency, slow=args.slow,
+        cache=None if args.no_cache else TranslationCache(),
+        memory=TranslationMemory() if args.memory else None,
+        audio_cache=None if args.no_cache else AudioCache(),
+    )
+    failed = 0
+    try:
+        with open(os.path.join(args.out, RESULTS_FILE), "a", encoding="utf-8") as results:
+            def record(result):
+                # Only this thread writes, so checkpoint and results lines never interleave
+                checkpoint.record(result)
+                results.write(json.dumps(result, ensure_ascii=False) + "\n")
+                results.flush()
+
+            try:
+                for done, result in enumerate(runner.run(remaining), start=1):
+                    record(result)
+                    if result["status"] == "failed":
+                        failed += 1
+                        print(f"[{done}/{len(remaining)}] {result['job_id']} failed: {result['error']}",
+                              file=sys.stderr)
+                    else:
+                        print(f"[{done}/{len(remaining)}] {result['job_id']} done in {result['seconds']}s",
+                              file=sys.stderr)
+            except KeyboardInterrupt:
+                print("Interrupted; saving jobs already running (Ctrl-C again to stop now)", file=sys.stderr)
+                for result in runner.drain():
+                    record(result)
+                raise
+    except KeyboardInterrupt:
+        print("Interrupted; rerun the same command to resume", file=sys.stderr)
+        return 130
+    finally:
+        checkpoint.close()
+        if args.metrics:
+            metrics = get_metrics()
+            with open(args.metrics, "w", encoding="utf-8") as metrics_file:
+                metrics_file.write(metrics.to_prometheus() if args.metrics.endswith(".prom") else metrics.to_json())
+
+    print(f"{len(remaining) - failed} done, {failed} failed, {skipped} skipped", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,342 @@
+# benchmark.py - Offline performance benchmarks against fake backends, with baseline regression checks
+import argparse
+import atexit
+import csv
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from batch_runner import BatchRunner, load_jobs
+from fake_backends import FakeGeminiModel, fake_tts
+from file_extraction import DOCX_TYPE, PDF_TYPE, extract_text
+from language_detection import detect_language_info
+from metrics import get_metrics
+from prompt_packing import translate_segments
+from translation_engine import translate_document
+from tts_engine import synthesize_speech
+from validation import sanitize_filename, validate_api_key, validate_text_length
+
+# Benchmark configuration
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+DEFAULT_REPEAT = 5
+DEFAULT_TOLERANCE = 0.25       # Slower than baseline by more than this share is a regression
+GEMINI_LATENCY = 0.05          # Seconds per fake Gemini call
+TTS_LATENCY = 0.02             # Seconds per fake gTTS segment
+
+# Sample sentences per script for synthetic corpora
+SENTENCES = {
+    "English": [
+        "The quick brown fox jumps over the lazy dog.",
+        "Please review the attached report before the meeting on Monday.",
+        "Our team shipped the new release ahead of schedule.",
+        "Remember to back up your files regularly.",
+        "The weather is expected to improve later this week.",
+    ],
+    "Spanish": ["¿Dónde está la estación de tren más cercana?", "Mañana iremos a la montaña con mis niños."],
+    "French": ["Le garçon a mangé une crème brûlée très sucrée.", "Où se trouve la bibliothèque, s'il vous plaît ?"],
+    "German": ["Die Straße ist wegen Bauarbeiten gesperrt.", "Wir müssen die Größe der Tür überprüfen."],
+    "Russian": ["Съешь же ещё этих мягких французских булок.", "Сегодня мы пойдём в парк на прогулку."],
+    "Chinese": ["我们今天去公园散步。", "这份报告需要在星期一之前完成。"],
+    "Japanese": ["今日はとてもいい天気ですね。", "会議は月曜日の午前十時に始まります。"],
+    "Korean": ["오늘 날씨가 정말 좋네요.", "회의는 월요일 오전에 시작합니다."],
+    "Arabic": ["مرحبا بكم في التطبيق الجديد.", "سيبدأ الاجتماع يوم الاثنين صباحا."],
+    "Hindi": ["आज मौसम बहुत अच्छा है।", "बैठक सोमवार सुबह शुरू होगी।"],
+    "Greek": ["Ο καιρός σήμερα είναι πολύ ωραίος.", "Η συνάντηση ξεκινά τη Δευτέρα."],
+}
+
+
+# Synthetic corpora
+
+def make_text(chars, languages=("English",), seed=0):
+    """Paragraphs of sample sentences from the given languages, about chars long"""
+    rng = random.Random(seed)
+    paragraphs = []
+    total = 0
+    while total < chars:
+        sentences = [rng.choice(SENTENCES[rng.choice(languages)]) for _ in range(rng.randint(3, 8))]
+        paragraph = " ".join(sentences)
+        paragraphs.append(paragraph)
+        total += len(paragraph) + 2
+    return "\n\n".join(paragraphs)
+
+
+def make_lines(count, seed=0):
+    """Short standalone lines, like UI strings or subtitle rows, with some repeats"""
+    rng = random.Random(seed)
+    pool = [sentence for sentences in SENTENCES.values() for sentence in sentences]
+    return [f"{rng.choice(pool)} ({rng.randint(1, count // 4 or 1)})" for _ in range(count)]
+
+
+def _pdf_string(text):
+    """Escape text for a PDF literal string"""
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages, lines_per_page=40, seed=0):
+    """A text-based PDF with Helvetica lines, written without any PDF library"""
+    rng = random.Random(seed)
+    english = SENTENCES["English"]
+    # Object numbers: 1 catalog, 2 page tree, 3 font, then a page and a content stream per page
+    page_ids = [4 + 2 * index for index in range(pages)]
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        2: ("<< /Type /Pages /Kids [%s] /Count %d >>"
+            % (" ".join(f"{page_id} 0 R" for page_id in page_ids), pages)).encode("ascii"),
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    for page_id in page_ids:
+        lines = [f"({_pdf_string(rng.choice(english))}) Tj T*" for _ in range(lines_per_page)]
+        stream = ("BT /F1 10 Tf 14 TL 50 760 Td " + " ".join(lines) + " ET").encode("ascii")
+        objects[page_id] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>"
+        ).encode("ascii")
+        objects[page_id + 1] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+
+    output = io.BytesIO()
+    output.write(b"%PDF-1.4\n")
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = output.tell()
+        output.write(b"%d 0 obj\n%s\nendobj\n" % (number, objects[number]))
+    xref_offset = output.tell()
+    output.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for number in sorted(objects):
+        output.write(b"%010d 00000 n \n" % offsets[number])
+    output.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset))
+    return output.getvalue()
+
+
+def make_docx(paragraphs, seed=0):
+    """A Word document of mixed-language paragraphs"""
+    import docx
+    rng = random.Random(seed)
+    document = docx.Document()
+    for _ in range(paragraphs):
+        document.add_paragraph(make_text(200, ("English", "Spanish", "French", "German"), seed=rng.random()))
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def make_csv(rows, seed=0):
+    """A CSV mixing text, numeric and date columns"""
+    rng = random.Random(seed)
+    english = SENTENCES["English"]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["id", "product", "description", "price", "updated"])
+    for row in range(rows):
+        writer.writerow([
+            row, f"Item {rng.randint(1, 500)}", rng.choice(english),
+            f"{rng.uniform(1, 500):.2f}", f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        ])
+    return buffer.getvalue().encode("utf-8")
+
+
+# Benchmark cases: each returns (callable, units processed per call, unit name)
+
+def build_cases(quick=False, gemini_latency=GEMINI_LATENCY, error_rate=0.0):
+    """Benchmark name -> zero-argument setup returning (run, amount, unit)"""
+    scale = 0.2 if quick else 1.0
+
+    def extraction(make, file_type):
+        def setup():
+            file_bytes = make()
+            return lambda: extract_text(file_bytes, file_type), len(file_bytes) / 1e6, "MB"
+        return setup
+
+    def detection(chars):
+        def setup():
+            text = make_text(chars, tuple(SENTENCES))
+            return lambda: detect_language_info(text), len(text) / 1e6, "Mchar"
+        return setup
+
+    def validation_setup():
+        text = make_text(int(1_000_000 * scale))
+        names = [f"report {index}: draft/final <v{index}>.pdf" for index in range(10_000)]
+
+        def run():
+            validate_text_length(text)
+            validate_api_key("AIza" + "x" * 35)
+            for name in names:
+                sanitize_filename(name)
+        return run, len(names), "call"
+
+    def model():
+        return FakeGeminiModel(latency=gemini_latency, jitter=gemini_latency / 5, error_rate=error_rate)
+
+    def translation_setup():
+        text = make_text(int(50_000 * scale))
+        return lambda: translate_document(model(), text, "Spanish"), len(text) / 1e3, "kchar"
+
+    def packed_setup():
+        lines = make_lines(int(2000 * scale))
+        return lambda: translate_segments(model(), lines, "Spanish"), len(lines), "line"
+
+    def tts_setup():
+        text = make_text(int(5_000 * scale))
+
+        def run():
+            with fake_tts(latency=TTS_LATENCY, jitter=TTS_LATENCY / 5, error_rate=error_rate):
+                synthesize_speech(text, "es")
+        return run, len(text) / 1e3, "kchar"
+
+    def startup_setup():
+        # A fresh interpreter importing what a worker loads before its first request
+        command = [sys.executable, "-c", "import pipeline, batch_runner, table_translation, fanout"]
+        here = os.path.dirname(os.path.abspath(__file__))
+        return lambda: subprocess.run(command, cwd=here, check=True), 1, "start"
+
+    def end_to_end_setup():
+        source_dir = tempfile.mkdtemp(prefix="bench-src-")
+        atexit.register(shutil.rmtree, source_dir, ignore_errors=True)
+        corpus = {
+            "notes.txt": make_text(int(20_000 * scale)).encode("utf-8"),
+            "report.pdf": make_pdf(max(2, int(20 * scale))),
+            "letter.docx": make_docx(max(5, int(50 * scale))),
+            "catalog.csv": make_csv(int(2000 * scale)),
+        }
+        for name, data in corpus.items():
+            with open(os.path.join(source_dir, name), "wb") as source_file:
+                source_file.write(data)
+        jobs = load_jobs(source_dir, ["Spanish", "Japanese"], audio=True)
+
+        def run():
+            with tempfile.TemporaryDirectory(prefix="bench-out-") as out_dir, \
+                    fake_tts(latency=TTS_LATENCY, jitter=TTS_LATENCY / 5, error_rate=error_rate):
+                results = list(BatchRunner(model(), out_dir).run(jobs))
+            failed = [result for result in results if result["status"] != "done"]
+            if failed and not error_rate:
+                raise RuntimeError(f"End-to-end job failed: {failed[0]['error']}")
+        return run, len(jobs), "job"
+
+    return {
+        "extract/txt": extraction(lambda: make_text(int(2_000_000 * scale)).encode("utf-8"), "text/plain"),
+        "extract/pdf-small": extraction(lambda: make_pdf(8), PDF_TYPE),
+        "extract/pdf-large": extraction(lambda: make_pdf(max(16, int(120 * scale))), PDF_TYPE),
+        "extract/docx": extraction(lambda: make_docx(int(1000 * scale)), DOCX_TYPE),
+        "extract/csv": extraction(lambda: make_csv(int(50_000 * scale)), "text/csv"),
+        "detect/1k": detection(1_000),
+        "detect/100k": detection(100_000),
+        "detect/1m": detection(int(1_000_000 * scale)),
+        "validate": validation_setup,
+        "translate/document": translation_setup,
+        "translate/packed-lines": packed_setup,
+        "tts/synthesize": tts_setup,
+        "e2e/batch": end_to_end_setup,
+        "startup/import": startup_setup,
+    }
+
+
+def measure(run, repeat):
+    """Run once to warm up, then return per-run seconds"""
+    run()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def compare(results, baseline, tolerance):
+    """Names of benchmarks slower than their baseline median by more than tolerance"""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get("results", {}).get(name)
+        if reference and result["median"] > reference["median"] * (1 + tolerance):
+            regressions.append(name)
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks with fake Gemini and gTTS backends.")
+    parser.add_argument("-k", "--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="timed runs per benchmark")
+    parser.add_argument("--quick", action="store_true", help="smaller corpora for a fast smoke run")
+    parser.add_argument("--gemini-latency", type=float, default=GEMINI_LATENCY, help="seconds per fake Gemini call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of fake backend calls that fail")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline file to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown against the baseline, as a fraction")
+    parser.add_argument("--json", metavar="PATH", help="also write results as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = {"quick": args.quick, "gemini_latency": args.gemini_latency, "error_rate": args.error_rate}
+    cases = {
+        name: setup for name, setup in build_cases(args.quick, args.gemini_latency, args.error_rate).items()
+        if args.filter in name
+    }
+    if not cases:
+        print(f"error: no benchmark matches '{args.filter}'", file=sys.stderr)
+        return 2
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get("config") != config:
+            print(f"warning: baseline was recorded with {baseline.get('config')}, not {config}", file=sys.stderr)
+
+    get_metrics().reset()
+    results = {}
+    print(f"{'benchmark':<24}{'median':>12}{'p95':>12}{'throughput':>20}{'vs baseline':>14}")
+    for name, setup in cases.items():
+        run, amount, unit = setup()
+        samples = measure(run, max(1, args.repeat))
+        median = statistics.median(samples)
+        results[name] = {
+            "median": median,
+            "p95": sorted(samples)[min(len(samples) - 1, int(len(samples) * 0.95))],
+            "throughput": amount / median if median else None,
+            "unit": f"{unit}/s",
+        }
+        reference = baseline.get("results", {}).get(name)
+        change = f"{(median / reference['median'] - 1) * 100:+.0f}%" if reference else "-"
+        throughput = f"{results[name]['throughput']:.1f} {unit}/s" if median else "-"
+        print(f"{name:<24}{median * 1000:>10.1f}ms{results[name]['p95'] * 1000:>10.1f}ms{throughput:>20}{change:>14}")
+
+    report = {
+        "config": config,
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "recorded": time.time(),
+        "results": results,
+        "stages": get_metrics().summary(),
+    }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as json_file:
+            json.dump(report, json_file, indent=2)
+    if args.save_baseline:
+        # Keep benchmarks that weren't run this time
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as baseline_file:
+                report["results"] = {**json.load(baseline_file).get("results", {}), **results}
+        with open(args.baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump(report, baseline_file, indent=2)
+        print(f"Baseline saved to {args.baseline}", file=sys.stderr)
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    for name in regressions:
+        print(f"REGRESSION {name}: {results[name]['median'] * 1000:.1f}ms vs baseline "
+              f"{baseline['results'][name]['median'] * 1000:.1f}ms", file=sys.stderr)
+    if not baseline:
+        print("No baseline found; run with --save-baseline to record one", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+# blob_store.py - Disk-backed, memory-mapped storage for per-session artifacts under a global budget
+import io
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import namedtuple
+
+from translation_cache import CACHE_DIR
+
+# Store configuration
+BLOB_DIR = os.path.join(CACHE_DIR, "sessions")
+MAX_STORE_BYTES = 2 * 1024 * 1024 * 1024   # 2 GB across all sessions
+SESSION_IDLE_SECONDS = 2 * 60 * 60         # Sessions untouched this long are evicted
+EVICTION_INTERVAL = 60                     # Seconds between full scans of the store
+
+# Lightweight reference kept in session state instead of the artifact itself
+BlobHandle = namedtuple("BlobHandle", ["session_id", "name", "size"])
+
+
+class BlobReader(io.RawIOBase):
+    """Read-only, seekable file object over a memory-mapped blob
+
+    Reads copy straight out of the page cache, so nothing is held on the
+    Python heap between reruns. The mapping survives the file being evicted.
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        with open(path, "rb") as blob_file:
+            self._size = os.fstat(blob_file.fileno()).st_size
+            # Empty files can't be mapped
+            self._mmap = mmap.mmap(blob_file.fileno(), 0, access=mmap.ACCESS_READ) if self._size else None
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = max(0, min(len(buffer), self._size - self._position))
+        if count:
+            buffer[:count] = self._mmap[self._position:self._position + count]
+            self._position += count
+        return count
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._size
+        self._position = max(0, offset)
+        return self._position
+
+    def tell(self):
+        return self._position
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        super().close()
+
+
+class BlobStore:
+    """Per-session artifact files shared by every session in the process
+
+    put() writes an artifact to disk and returns a BlobHandle; open()
+    memory-maps it back for playback or download. Every session has its own
+    directory whose mtime records its last activity. Idle sessions, and then
+    the least recently active ones, are evicted to keep the store under
+    max_bytes; open() on an evicted handle raises FileNotFoundError.
+    """
+
+    def __init__(self, root=BLOB_DIR, max_bytes=MAX_STORE_BYTES, idle_seconds=SESSION_IDLE_SECONDS):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        self._last_eviction = 0.0
+        self._estimated_bytes = 0      # Store size at the last scan plus bytes written since
+        os.makedirs(root, exist_ok=True)
+
+    def _session_dir(self, session_id):
+        return os.path.join(self.root, session_id)
+
+    def _path(self, handle):
+        return os.path.join(self._session_dir(handle.session_id), handle.name)
+
+    def touch(self, session_id):
+        """Mark a session as active, and evict idle ones at most every EVICTION_INTERVAL"""
+        session_dir = self._session_dir(session_id)
+        try:
+            os.utime(session_dir, None)
+        except FileNotFoundError:
+            pass
+        if time.time() - self._last_eviction >= EVICTION_INTERVAL:
+            self.evict(protect=session_id)
+
+    def put(self, session_id, name, data):
+        """Store bytes or text under name for a session, replacing any earlier version"""
+        if os.path.basename(name) != name or name.startswith("."):
+            raise ValueError(f"Invalid blob name: {name}")
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        session_dir = self._session_dir(session_id)
+        os.makedirs(session_dir, exist_ok=True)
+        # Write to a temp file and rename, so a concurrent reader never maps a partial file
+        fd, temp_path = tempfile.mkstemp(dir=session_dir, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                temp_file.write(data)
+            os.replace(temp_path, os.path.join(session_dir, name))
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        with self._lock:
+            self._estimated_bytes += len(data)
+            over_budget = self._estimated_bytes > self.max_bytes
+        if over_budget:
+            self.evict(protect=session_id)
+        return BlobHandle(session_id, name, len(data))
+
+    def open(self, handle):
+        """Memory-mapped file object for a blob; raises FileNotFoundError once evicted"""
+        return BlobReader(self._path(handle))
+
+    def read_text(self, handle):
+        """Decode a text blob; raises FileNotFoundError once evicted"""
+        with self.open(handle) as reader:
+            return reader.read().decode("utf-8")
+
+    def exists(self, handle):
+        return os.path.exists(self._path(handle))
+
+    def _sessions(self):
+        """[(last_active, bytes, session_dir)] for every stored session"""
+        sessions = []
+        for entry in os.scandir(self.root):
+            if not entry.is_dir():
+                continue
+            try:
+                size = sum(child.stat().st_size for child in os.scandir(entry.path) if child.is_file())
+                sessions.append((entry.stat().st_mtime, size, entry.path))
+            except FileNotFoundError:
+                # Evicted by another thread mid-scan
+                continue
+        return sessions
+
+    def usage(self):
+        """(total_bytes, session_count) currently on disk"""
+        with self._lock:
+            sessions = self._sessions()
+        return sum(size for _, size, _ in sessions), len(sessions)
+
+    def evict(self, protect=None):
+        """Remove idle sessions, then the least recently active ones while over budget
+
+        The protected session is never evicted, so the caller's own artifacts
+        survive even if they alone exceed the budget.
+        """
+        with self._lock:
+            self._last_eviction = time.time()
+            sessions = sorted(self._sessions())
+            total = sum(size for _, size, _ in sessions)
+            idle_before = time.time() - self.idle_seconds
+            protected = self._session_dir(protect) if protect else None
+            for last_active, size, session_dir in sessions:
+                if session_dir == protected:
+                    continue
+                if last_active >= idle_before and total <= self.max_bytes:
+                    # Sorted oldest first, so every remaining session is active and within budget
+                    break
+                shutil.rmtree(session_dir, ignore_errors=True)
+                total -= size
+            self._estimated_bytes = total
+
+    def clear_session(self, session_id):
+        """Drop every artifact of a session"""
+        shutil.rmtree(self._session_dir(session_id), ignore_errors=True)
@@ -0,0 +1,148 @@
+# client_pool.py - Process-wide pool of configured Gemini models and keep-alive HTTP sessions for gTTS
+import threading
+
+# Pool configuration
+HTTP_POOL_CONNECTIONS = 8      # Hosts kept alive per session
+HTTP_POOL_MAXSIZE = 16         # Connections kept alive per host
+HTTP_POOL_IDLE_SESSIONS = 16   # Idle sessions kept for reuse; extra ones are closed when returned
+
+_lock = threading.Lock()
+_models = {}                   # (api_key, model_name) -> GenerativeModel; not isolated per key, see configure()
+_configured_key = None
+_idle_sessions = []            # Keep-alive sessions not currently checked out, most recently used last
+_gtts_patched = False
+
+
+def configure(api_key):
+    """Point the Gemini SDK at api_key, skipping the call if it's already configured
+
+    The SDK's configuration is process-global: whichever key was configured
+    last is the one new requests pick up. Sessions using different keys at
+    the same time can therefore send requests under each other's key, so a
+    server process should be used with one API key at a time.
+    """
+    global _configured_key
+    # Deferred so processes that never call Gemini don't pay for importing the SDK
+    import google.generativeai as genai
+    with _lock:
+        if _configured_key != api_key:
+            genai.configure(api_key=api_key)
+            _configured_key = api_key
+
+
+def get_model(api_key, model_name):
+    """Shared GenerativeModel for (api_key, model_name), built on first use
+
+    Pooling saves rebuilding the model on every rerun; it does not isolate
+    keys from each other (see configure()).
+    """
+    import google.generativeai as genai
+    configure(api_key)
+    key = (api_key, model_name)
+    with _lock:
+        model = _models.get(key)
+        if model is None:
+            model = _models[key] = genai.GenerativeModel(model_name)
+        return model
+
+
+def _new_http_session():
+    """requests.Session with a connection pool sized for concurrent gTTS segments"""
+    import requests
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def checkout_http_session():
+    """Keep-alive requests.Session for exclusive use until passed to release_http_session()
+
+    requests sessions aren't guaranteed thread-safe, so each caller gets one
+    to itself; sessions go back to a process-wide pool afterwards, so their
+    connections outlive the short-lived worker threads, reruns and sessions
+    that use them.
+    """
+    with _lock:
+        if _idle_sessions:
+            return _idle_sessions.pop()
+    return _new_http_session()
+
+
+def release_http_session(session):
+    """Return a checked-out session to the pool, closing it if the pool is full"""
+    with _lock:
+        if len(_idle_sessions) < HTTP_POOL_IDLE_SESSIONS:
+            _idle_sessions.append(session)
+            return
+    session.close()
+
+
+class _ReusedSession:
+    """Pooled session handed out in place of requests.Session()
+
+    Attribute access goes to the checked-out session, so it works whether
+    or not the caller uses it as a context manager; leaving the with block
+    or calling close() returns it to the pool, open.
+    """
+
+    _session = None
+
+    def __init__(self):
+        self._session = checkout_http_session()
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def close(self):
+        session, self._session = self._session, None
+        if session is not None:
+            release_http_session(session)
+
+
+class _KeepAliveRequests:
+    """Stand-in for the requests module inside gtts.tts that routes traffic through pooled sessions
+
+    gTTS opens a fresh Session (or calls requests.post) for every ~100
+    character token request, paying a TCP and TLS handshake each time.
+    """
+
+    def __init__(self, requests_module):
+        self._requests = requests_module
+
+    def Session(self):
+        return _ReusedSession()
+
+    def post(self, *args, **kwargs):
+        with _ReusedSession() as session:
+            return session.post(*args, **kwargs)
+
+    def get(self, *args, **kwargs):
+        with _ReusedSession() as session:
+            return session.get(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._requests, name)
+
+
+def create_tts(text, lang, slow=False):
+    """gTTS object whose requests reuse keep-alive connections
+
+    Replaces the requests module seen by gtts.tts, which depends on gTTS
+    internals; requirements.txt pins the gTTS series this was tested with.
+    """
+    global _gtts_patched
+    import gtts.tts
+    with _lock:
+        if not _gtts_patched:
+            gtts.tts.requests = _KeepAliveRequests(gtts.tts.requests)
+            _gtts_patched = True
+    return gtts.tts.gTTS(text=text, lang=lang, slow=slow)
@@ -0,0 +1,126 @@
+# fake_backends.py - Local stand-ins for Gemini and gTTS with configurable latency and failure rates
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+import tts_engine
+
+# A silent MPEG-1 Layer III frame header (128 kbps, 44.1 kHz) padded to a full 417-byte frame
+_MP3_FRAME = b"\xff\xfb\x90\x64" + b"\x00" * 413
+CHARS_PER_FRAME = 10           # Roughly how much speech one fake frame stands for
+
+
+class FakeBackendError(Exception):
+    """Injected failure from a fake backend"""
+
+
+class _Latency:
+    """Shared latency/failure model: mean latency with uniform jitter and an error rate"""
+
+    def __init__(self, latency, jitter, error_rate, rate_limit_share, seed):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_share = rate_limit_share
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+
+    def wait(self, per_char=0.0, chars=0):
+        """Sleep for one call's latency, then maybe raise an injected failure"""
+        with self._lock:
+            self.calls += 1
+            delay = max(0.0, self.latency + per_char * chars + self._random.uniform(-self.jitter, self.jitter))
+            failing = self._random.random() < self.error_rate
+            rate_limited = failing and self._random.random() < self.rate_limit_share
+            if failing:
+                self.failures += 1
+        time.sleep(delay)
+        if rate_limited:
+            raise FakeBackendError("429 Resource exhausted: quota exceeded (injected)")
+        if failing:
+            raise FakeBackendError("Injected backend failure")
+
+
+class FakeResponse:
+    """The parts of a Gemini response the pipeline reads"""
+
+    def __init__(self, text):
+        self.text = text
+        self.usage_metadata = None
+
+
+class FakeGeminiModel:
+    """Drop-in for genai.GenerativeModel that 'translates' by echoing the prompt's payload
+
+    Plain, hinted, delimited and JSON-array prompts are all answered in the
+    shape the pipeline expects, so chunking, packing and reassembly run for
+    real. latency is seconds per call plus per_char seconds per prompt
+    character; error_rate of calls fail, rate_limit_share of those as 429s.
+    """
+
+    def __init__(self, latency=0.2, jitter=0.05, per_char=0.0, error_rate=0.0, rate_limit_share=0.5,
+                 stream_parts=4, seed=0):
+        self.per_char = per_char
+        self.stream_parts = stream_parts
+        self.timing = _Latency(latency, jitter, error_rate, rate_limit_share, seed)
+
+    @staticmethod
+    def answer(prompt):
+        """The response text a well-behaved model would return for prompt"""
+        header, _, payload = prompt.partition("\n")
+        if "JSON array" in header:
+            return json.dumps(json.loads(payload), ensure_ascii=False)
+        if "Text to translate:\n" in prompt:
+            return prompt.rsplit("Text to translate:\n", 1)[1]
+        return payload
+
+    def generate_content(self, prompt, stream=False, generation_config=None):
+        if not stream:
+            self.timing.wait(self.per_char, len(prompt))
+            return FakeResponse(self.answer(prompt))
+        return self._stream(prompt)
+
+    def _stream(self, prompt):
+        """Yield the answer in stream_parts pieces, spreading the latency across them"""
+        text = self.answer(prompt)
+        step = max(1, -(-len(text) // self.stream_parts))
+        self.timing.wait(self.per_char, len(prompt) / self.stream_parts)
+        for start in range(0, len(text), step):
+            if start:
+                time.sleep(self.timing.latency / self.stream_parts)
+            yield FakeResponse(text[start:start + step])
+
+
+class FakeTTS:
+    """Drop-in for gtts.gTTS writing silent MP3 frames proportional to the text length"""
+
+    timing = _Latency(0.1, 0.02, 0.0, 0.0, 0)
+    per_char = 0.0
+
+    def __init__(self, text, lang="en", slow=False):
+        self.text = text
+        self.lang = lang
+        self.slow = slow
+
+    def write_to_fp(self, fp):
+        self.timing.wait(self.per_char, len(self.text))
+        fp.write(_MP3_FRAME * max(1, len(self.text) // CHARS_PER_FRAME))
+
+
+@contextmanager
+def fake_tts(latency=0.1, jitter=0.02, per_char=0.0, error_rate=0.0, seed=0):
+    """Route tts_engine through FakeTTS for the duration of the block"""
+    fake = type("ConfiguredFakeTTS", (FakeTTS,), {
+        "timing": _Latency(latency, jitter, error_rate, 0.0, seed),
+        "per_char": per_char,
+    })
+    original = tts_engine.create_tts
+    tts_engine.create_tts = fake
+    try:
+        yield fake
+    finally:
+        tts_engine.create_tts = original
@@ -0,0 +1,93 @@
+# fanout.py - Translate one input into many target languages concurrently
+import asyncio
+import io
+import zipfile
+
+from metrics import get_metrics
+from translation_engine import DEFAULT_MODEL_NAME, translate_document
+from tts_engine import synthesize_speech
+
+DEFAULT_CONCURRENCY = 5   # Target languages translated at the same time
+
+
+async def _run_limited(semaphore, language, func, *args, **kwargs):
+    """Run a blocking call in a worker thread under the concurrency limit
+
+    Returns (language, result, error) so results can be matched as they finish.
+    """
+    async with semaphore:
+        try:
+            result = await asyncio.to_thread(func, *args, **kwargs)
+            return language, result, None
+        except Exception as e:
+            return language, None, e
+
+
+async def _fan_out(calls, max_concurrency, on_result):
+    """Run (language, func, args, kwargs) calls concurrently, reporting each as it completes"""
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    tasks = [
+        asyncio.create_task(_run_limited(semaphore, language, func, *args, **kwargs))
+        for language, func, args, kwargs in calls
+    ]
+    results = {}
+    errors = {}
+    for next_done in asyncio.as_completed(tasks):
+        language, result, error = await next_done
+        if error is None:
+            results[language] = result
+        else:
+            errors[language] = error
+        if on_result:
+            on_result(language, result, error)
+    return results, errors
+
+
+def translate_to_many(model, text, target_languages, max_concurrency=DEFAULT_CONCURRENCY,
+                      cache=None, model_name=DEFAULT_MODEL_NAME, on_result=None):
+    """Translate text into every target language concurrently
+
+    on_result(language, translation, error) is called from the calling
+    thread as each language finishes. Returns (translations, errors) dicts
+    keyed by language name.
+    """
+    calls = [
+        (language, translate_document, (model, text, language), {"cache": cache, "model_name": model_name})
+        for language in target_languages
+    ]
+    return asyncio.run(_fan_out(calls, max_concurrency, on_result))
+
+
+def synthesize_many(translations, language_codes, slow=False, max_concurrency=DEFAULT_CONCURRENCY,
+                    audio_cache=None, on_result=None):
+    """Synthesize audio for every translation concurrently
+
+    language_codes maps language name to gTTS code. Cached audio is reused
+    and new audio is stored when audio_cache is given.
+    """
+    def synthesize_cached(text, language_code):
+        audio_bytes = audio_cache.get(text, language_code, slow) if audio_cache is not None else None
+        if audio_bytes is None:
+            audio_bytes = synthesize_speech(text, language_code, slow)
+            if audio_cache is not None:
+                audio_cache.put(text, language_code, slow, audio_bytes)
+        return audio_bytes
+
+    calls = [
+        (language, synthesize_cached, (text, language_codes[language]), {})
+        for language, text in translations.items()
+    ]
+    return asyncio.run(_fan_out(calls, max_concurrency, on_result))
+
+
+def build_zip(translations, audio, file_stem="translation"):
+    """Bundle translated text and MP3s into one ZIP archive"""
+    buffer = io.BytesIO()
+    with get_metrics().timer("download_prep", format="zip"):
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            for language, text in translations.items():
+                archive.writestr(f"{file_stem}_{language}.txt", text)
+            for language, audio_bytes in audio.items():
+                # MP3 is already compressed
+                archive.writestr(f"{file_stem}_{language}.mp3", audio_bytes, compress_type=zipfile.ZIP_STORED)
+    return buffer.getvalue()
@@ -0,0 +1,271 @@
+# file_extraction.py - Pluggable, incremental text extraction for uploaded files
+import hashlib
+import io
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+# PyPDF2, pandas and python-docx are imported inside the extractors that need
+# them, so start-up (and every spawned PDF worker) only loads what a file uses
+from metrics import get_metrics
+
+PDF_TYPE = "application/pdf"
+EXCEL_TYPES = ["application/vnd.ms-excel", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"]
+DOCX_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+# Extraction configuration
+PDF_PARALLEL_MIN_PAGES = 16   # Smaller PDFs are extracted in-process, a pool costs more than it saves
+PDF_PAGES_PER_TASK = 8        # Pages sent to a worker process per task
+PDF_MAX_PROCESSES = min(4, os.cpu_count() or 1)
+CSV_ROWS_PER_BLOCK = 5000     # Rows rendered per yielded CSV block
+DOCX_PARAGRAPHS_PER_BLOCK = 200
+EXTRACTION_CACHE_CHARS = 50_000_000  # Total extracted characters kept across all sessions
+
+# MIME type -> generator function(file_bytes, pages, warnings) yielding text blocks
+_EXTRACTORS = {}
+
+
+def register_extractor(*file_types):
+    """Register a generator function as the extractor for the given MIME types"""
+    def decorator(func):
+        for file_type in file_types:
+            _EXTRACTORS[file_type] = func
+        return func
+    return decorator
+
+
+def supported_file_types():
+    """MIME types with a registered extractor"""
+    return list(_EXTRACTORS)
+
+
+def supports_page_ranges(file_type):
+    """Whether the extractor for file_type honours a page selection"""
+    return file_type == PDF_TYPE
+
+
+def file_content_hash(file_bytes):
+    """Content hash identifying an upload independent of its filename"""
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+def parse_page_ranges(spec, page_count):
+    """Parse a selection like '1-3, 7, 10-' into sorted zero-based page indices
+
+    An empty spec selects every page. Raises ValueError on malformed input.
+    """
+    if not spec or not spec.strip():
+        return list(range(page_count))
+
+    selected = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            if "-" in part:
+                start_text, end_text = part.split("-", 1)
+                start = int(start_text) if start_text.strip() else 1
+                end = int(end_text) if end_text.strip() else page_count
+            else:
+                start = end = int(part)
+        except ValueError:
+            raise ValueError(f"Invalid page range '{part}'. Use numbers like 1-3, 7, 10-")
+        if start < 1 or end > page_count or start > end:
+            raise ValueError(f"Page range '{part}' is outside 1-{page_count}")
+        selected.update(range(start - 1, end))
+    return sorted(selected)
+
+
+def count_pages(file_bytes, file_type):
+    """Number of pages for paged formats, None otherwise"""
+    if not supports_page_ranges(file_type):
+        return None
+    import PyPDF2
+    return len(PyPDF2.PdfReader(io.BytesIO(file_bytes)).pages)
+
+
+def iter_text(file_bytes, file_type, pages=None, warnings=None):
+    """Yield text blocks from an uploaded file as they are extracted
+
+    The full text is "\\n".join(blocks). pages is a list of zero-based page
+    indices for paged formats; warnings, if given, collects non-fatal problems
+    such as unreadable pages. Raises ValueError for unsupported file types.
+    """
+    extractor = _EXTRACTORS.get(file_type)
+    if extractor is None:
+        raise ValueError(f"Unsupported file type: {file_type}")
+    blocks = extractor(file_bytes, pages=pages, warnings=warnings if warnings is not None else [])
+    # Extractors are named _iter_<format>, which makes a short metrics label
+    return _measure_blocks(blocks, extractor.__name__[len("_iter_"):], len(file_bytes))
+
+
+def _measure_blocks(blocks, file_format, byte_count):
+    """Pass blocks through while recording extraction time, bytes in and characters out"""
+    metrics = get_metrics()
+    characters = 0
+    try:
+        for block in metrics.timed_iter(blocks, "extraction", format=file_format):
+            characters += len(block) + 1
+            yield block
+    finally:
+        metrics.count("extraction_bytes", byte_count, format=file_format)
+        metrics.count("extraction_characters", max(0, characters - 1), format=file_format)
+
+
+def extract_text(file_bytes, file_type, pages=None):
+    """Extract the full text of an uploaded file, returning (text, warnings)"""
+    warnings = []
+    text = "\n".join(iter_text(file_bytes, file_type, pages=pages, warnings=warnings))
+    return text, warnings
+
+
+@register_extractor("text/plain")
+def _iter_txt(file_bytes, pages=None, warnings=None):
+    """Handle TXT files line by line"""
+    with io.TextIOWrapper(io.BytesIO(file_bytes), encoding="utf-8", newline="") as reader:
+        for line in reader:
+            yield line.rstrip("\r\n")
+
+
+# PDF page workers: each process parses the document once in its initializer,
+# then extracts batches of page indices sent by the parent
+_worker_reader = None
+
+
+def _init_pdf_worker(file_bytes):
+    """Open the PDF once per worker process"""
+    global _worker_reader
+    import PyPDF2
+    _worker_reader = PyPDF2.PdfReader(io.BytesIO(file_bytes))
+
+
+def _extract_pdf_pages(page_indices):
+    """Extract a batch of pages in a worker, None marks an unreadable page"""
+    results = []
+    for index in page_indices:
+        try:
+            results.append((index, _worker_reader.pages[index].extract_text()))
+        except Exception:
+            results.append((index, None))
+    return results
+
+
+def _pdf_page_text(index, text, warnings):
+    """Report unreadable pages and return the text to yield"""
+    if text is None:
+        warnings.append(f"Could not read page {index + 1}")
+        return ""
+    return text
+
+
+@register_extractor(PDF_TYPE)
+def _iter_pdf(file_bytes, pages=None, warnings=None):
+    """Handle PDF files page by page, spreading large documents across processes"""
+    import PyPDF2
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_bytes))
+    if pages is None:
+        pages = list(range(len(pdf_reader.pages)))
+    if not pages:
+        return
+
+    if len(pages) < PDF_PARALLEL_MIN_PAGES or PDF_MAX_PROCESSES < 2:
+        for index in pages:
+            try:
+                text = pdf_reader.pages[index].extract_text()
+            except Exception:
+                text = None
+            yield _pdf_page_text(index, text, warnings)
+        return
+
+    # Start the pool on the remaining pages first, then extract the first page
+    # in-process so a preview is available without waiting on worker start-up
+    rest = pages[1:]
+    batches = [rest[i:i + PDF_PAGES_PER_TASK] for i in range(0, len(rest), PDF_PAGES_PER_TASK)]
+    with ProcessPoolExecutor(
+        max_workers=min(PDF_MAX_PROCESSES, len(batches)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_pdf_worker,
+        initargs=(file_bytes,),
+    ) as executor:
+        results = executor.map(_extract_pdf_pages, batches)
+        try:
+            first_text = pdf_reader.pages[pages[0]].extract_text()
+        except Exception:
+            first_text = None
+        del pdf_reader
+        yield _pdf_page_text(pages[0], first_text, warnings)
+
+        for batch in results:
+            for index, text in batch:
+                yield _pdf_page_text(index, text, warnings)
+
+
+@register_extractor("text/csv")
+def _iter_csv(file_bytes, pages=None, warnings=None):
+    """Handle CSV files in row blocks so large files are never rendered whole"""
+    import pandas as pd
+    for block in pd.read_csv(io.BytesIO(file_bytes), chunksize=CSV_ROWS_PER_BLOCK):
+        yield block.to_string()
+
+
+@register_extractor(*EXCEL_TYPES)
+def _iter_excel(file_bytes, pages=None, warnings=None):
+    """Handle Excel files"""
+    import pandas as pd
+    yield pd.read_excel(io.BytesIO(file_bytes)).to_string()
+
+
+@register_extractor(DOCX_TYPE)
+def _iter_docx(file_bytes, pages=None, warnings=None):
+    """Handle Word documents in paragraph blocks"""
+    import docx
+    doc = docx.Document(io.BytesIO(file_bytes))
+    block = []
+    for paragraph in doc.paragraphs:
+        block.append(paragraph.text)
+        if len(block) >= DOCX_PARAGRAPHS_PER_BLOCK:
+            yield "\n".join(block)
+            block = []
+    if block:
+        yield "\n".join(block)
+
+
+class ExtractionCache:
+    """LRU of extracted text shared across reruns and sessions, bounded by total characters
+
+    Extracted text can be much larger than the uploaded file (a rendered
+    table, say), so the budget counts characters rather than entries. A
+    single text larger than the whole budget isn't cached.
+    """
+
+    def __init__(self, max_chars=EXTRACTION_CACHE_CHARS):
+        self.max_chars = max_chars
+        self._entries = OrderedDict()
+        self._chars = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return (text, warnings) for key or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        get_metrics().count_cache("extraction", entry is not None)
+        return entry
+
+    def put(self, key, text, warnings):
+        """Store an extraction result, evicting the least recently used entries past the budget"""
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._chars -= len(previous[0])
+            if len(text) > self.max_chars:
+                return
+            self._entries[key] = (text, warnings)
+            self._chars += len(text)
+            while self._chars > self.max_chars:
+                _, (evicted_text, _) = self._entries.popitem(last=False)
+                self._chars -= len(evicted_text)
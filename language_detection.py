@@ -0,0 +1,218 @@
+# language_detection.py - Single-pass, table-driven script classifier and source-language guesser
+from bisect import bisect_right
+from collections import Counter
+
+from metrics import get_metrics
+
+# Detection configuration
+SAMPLE_THRESHOLD = 100_000    # Inputs longer than this are sampled instead of fully scanned
+SAMPLE_WINDOWS = 20           # Evenly spaced windows taken from long inputs
+SAMPLE_WINDOW_CHARS = 5000
+MIXED_SCRIPT_SHARE = 0.2      # A second script above this share is reported as mixed
+LATIN_CONFIDENCE = 0.6        # Accent-based guesses for Latin languages are weak evidence
+SAME_LANGUAGE_CONFIDENCE = 0.9  # Minimum confidence to report the source as already in the target language
+
+# Codepoint ranges (start, end, script), sorted by start
+_SCRIPT_RANGES = [
+    (0x0041, 0x005A, "Latin"),
+    (0x0061, 0x007A, "Latin"),
+    (0x00C0, 0x024F, "Latin"),
+    (0x0370, 0x03FF, "Greek"),
+    (0x0400, 0x052F, "Cyrillic"),
+    (0x0590, 0x05FF, "Hebrew"),
+    (0x0600, 0x06FF, "Arabic"),
+    (0x0750, 0x077F, "Arabic"),
+    (0x0900, 0x097F, "Devanagari"),
+    (0x0E00, 0x0E7F, "Thai"),
+    (0x1100, 0x11FF, "Hangul"),
+    (0x1E00, 0x1EFF, "Latin"),
+    (0x3040, 0x309F, "Hiragana"),
+    (0x30A0, 0x30FF, "Katakana"),
+    (0x3130, 0x318F, "Hangul"),
+    (0x3400, 0x4DBF, "Han"),
+    (0x4E00, 0x9FFF, "Han"),
+    (0xAC00, 0xD7AF, "Hangul"),
+    (0xF900, 0xFAFF, "Han"),
+    (0xFF66, 0xFF9F, "Katakana"),
+]
+_RANGE_STARTS = [start for start, _, _ in _SCRIPT_RANGES]
+
+# Scripts that identify a single language on their own
+_SCRIPT_LANGUAGES = {
+    "Han": "Chinese",
+    "Hangul": "Korean",
+    "Cyrillic": "Russian",
+    "Hebrew": "Hebrew",
+    "Arabic": "Arabic",
+    "Devanagari": "Hindi",
+    "Greek": "Greek",
+    "Thai": "Thai",
+}
+
+# Accented letters and the Latin-script languages that use them
+_LATIN_MARKERS = {
+    "ñ": ["Spanish"], "¿": ["Spanish"], "¡": ["Spanish"],
+    "á": ["Spanish", "Portuguese"], "í": ["Spanish", "Portuguese"],
+    "ó": ["Spanish", "Portuguese"], "ú": ["Spanish", "Portuguese"],
+    "é": ["French", "Spanish", "Portuguese", "Italian"],
+    "è": ["French", "Italian"], "à": ["French", "Italian", "Portuguese"],
+    "â": ["French", "Portuguese"], "ê": ["French", "Portuguese"], "ô": ["French", "Portuguese"],
+    "ë": ["French"], "î": ["French"], "ï": ["French"], "û": ["French"], "ù": ["French"],
+    "œ": ["French"], "ÿ": ["French"],
+    "ç": ["French", "Portuguese", "Turkish"],
+    "ã": ["Portuguese"], "õ": ["Portuguese"],
+    "ì": ["Italian"], "ò": ["Italian"],
+    "ß": ["German"], "ä": ["German", "Swedish"],
+    "ö": ["German", "Swedish", "Turkish"], "ü": ["German", "Turkish"],
+    "å": ["Swedish"],
+    "ą": ["Polish"], "ę": ["Polish"], "ł": ["Polish"], "ś": ["Polish"],
+    "ź": ["Polish"], "ż": ["Polish"], "ć": ["Polish"], "ń": ["Polish"],
+    "ğ": ["Turkish"], "ş": ["Turkish"], "ı": ["Turkish"],
+}
+
+# Display labels for detect_language_info
+_LANGUAGE_LABELS = {
+    "Chinese": "🇨🇳 Chinese characters detected",
+    "Japanese": "🇯🇵 Japanese characters detected",
+    "Korean": "🇰🇷 Korean characters detected",
+    "Russian": "🇷🇺 Cyrillic characters detected",
+    "Hebrew": "🇮🇱 Hebrew characters detected",
+    "Arabic": "🇸🇦 Arabic characters detected",
+    "Hindi": "🇮🇳 Devanagari characters detected",
+    "Greek": "🇬🇷 Greek characters detected",
+    "Thai": "🇹🇭 Thai characters detected",
+    "Spanish": "🇪🇸 Spanish characters detected",
+    "French": "🇫🇷 French characters detected",
+    "German": "🇩🇪 German characters detected",
+    "Portuguese": "🇵🇹 Portuguese characters detected",
+    "Italian": "🇮🇹 Italian characters detected",
+    "Polish": "🇵🇱 Polish characters detected",
+    "Turkish": "🇹🇷 Turkish characters detected",
+    "Swedish": "🇸🇪 Swedish characters detected",
+    "English": "🇺🇸 Latin characters detected",
+}
+
+
+def script_of(char):
+    """Script name for a single character, or None for digits, punctuation and unknown scripts"""
+    codepoint = ord(char)
+    index = bisect_right(_RANGE_STARTS, codepoint) - 1
+    if index >= 0:
+        start, end, script = _SCRIPT_RANGES[index]
+        if codepoint <= end:
+            return script
+    return None
+
+
+def _sample(text):
+    """Evenly spaced windows of a long text, or the text itself"""
+    if len(text) <= SAMPLE_THRESHOLD:
+        return text
+    step = len(text) // SAMPLE_WINDOWS
+    return "".join(text[i:i + SAMPLE_WINDOW_CHARS] for i in range(0, len(text), step))
+
+
+def analyze_text(text):
+    """Scan text once and return (script_histogram, latin_marker_histogram)
+
+    The character histogram is built in a single C-level pass; only the
+    distinct characters are then classified against the range table.
+    """
+    char_counts = Counter(_sample(text))
+    scripts = Counter()
+    markers = Counter()
+    for char, count in char_counts.items():
+        script = script_of(char)
+        if script is None:
+            # ¿ and ¡ sit outside the letter ranges but still mark Spanish
+            if char in _LATIN_MARKERS:
+                markers[char] += count
+            continue
+        scripts[script] += count
+        if script == "Latin":
+            lower = char.lower()
+            if lower in _LATIN_MARKERS:
+                markers[lower] += count
+    return scripts, markers
+
+
+def rank_languages(text):
+    """Return [(language, confidence), ...] ranked from most to least likely"""
+    with get_metrics().timer("language_detection"):
+        return _rank_languages(text)
+
+
+def _rank_languages(text):
+    """Untimed body of rank_languages"""
+    scripts, markers = analyze_text(text)
+    total = sum(scripts.values())
+    if not total:
+        return []
+
+    scores = Counter()
+    kana = scripts["Hiragana"] + scripts["Katakana"]
+    if kana:
+        # Kanji alongside kana is Japanese, not Chinese
+        scores["Japanese"] += (kana + scripts["Han"]) / total
+    for script, language in _SCRIPT_LANGUAGES.items():
+        if script == "Han" and kana:
+            continue
+        if scripts[script]:
+            scores[language] += scripts[script] / total
+
+    if scripts["Latin"]:
+        latin_share = scripts["Latin"] / total * LATIN_CONFIDENCE
+        marker_total = sum(markers.values())
+        if marker_total:
+            for char, count in markers.items():
+                languages = _LATIN_MARKERS[char]
+                for language in languages:
+                    scores[language] += latin_share * count / marker_total / len(languages)
+        else:
+            scores["English"] += latin_share
+
+    return scores.most_common()
+
+
+def _is_latin(language):
+    """Whether a language guess came from Latin-script evidence"""
+    return language != "Japanese" and language not in _SCRIPT_LANGUAGES.values()
+
+
+def guess_source_language(text):
+    """Most likely source language and its confidence, or (None, 0.0)"""
+    ranked = rank_languages(text)
+    return ranked[0] if ranked else (None, 0.0)
+
+
+def is_same_language(text, target_language):
+    """Whether text looks like it's already in target_language
+
+    Advisory only: the guess comes from a script histogram, so languages
+    sharing a script (Ukrainian and Russian, Persian and Arabic, Marathi and
+    Hindi, kanji-only Japanese and Chinese) can't be told apart.
+    """
+    language, confidence = guess_source_language(text)
+    return language == target_language and confidence >= SAME_LANGUAGE_CONFIDENCE
+
+
+def detect_language_info(text):
+    """Detect input language characteristics"""
+    if not text:
+        return "No text provided"
+
+    ranked = rank_languages(text)
+    if not ranked:
+        return _LANGUAGE_LABELS["English"]
+
+    top_language = ranked[0][0]
+    info = _LANGUAGE_LABELS.get(top_language, _LANGUAGE_LABELS["English"])
+    # Report other scripts only when they're a substantial part of the text; Latin
+    # languages share a script, so they never count as mixed with each other
+    mixed = [
+        language for language, score in ranked[1:]
+        if score >= MIXED_SCRIPT_SHARE and not (_is_latin(language) and _is_latin(top_language))
+    ]
+    if mixed:
+        info += f" (mixed with {', '.join(mixed)})"
+    return info
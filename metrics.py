@@ -0,0 +1,298 @@
+# metrics.py - Process-wide stage timings, counters and profiling shared by every session
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds in seconds, Prometheus style
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PROFILE_HISTORY = 10           # Profiles kept for display
+PROFILE_LINES = 25             # Functions listed per profile
+METRIC_PREFIX = "translator"
+
+
+def _label_key(labels):
+    """Hashable, ordered form of a labels dict"""
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(label_key, extra=()):
+    """Prometheus label block like {stage="tts",le="0.5"}"""
+    pairs = list(label_key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q):
+        """Approximate quantile by linear interpolation inside the matching bucket"""
+        if not self.count:
+            return None
+        return min(self.max, max(self.min, self._interpolate(q)))
+
+    def _interpolate(self, q):
+        """Bucket-interpolated quantile, unclamped"""
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                if index == len(self.buckets):
+                    return lower
+                return lower + (self.buckets[index] - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+
+class Metrics:
+    """Thread-safe registry of stage latency histograms and counters
+
+    Stages are timed with timer() or timed_iter(); counters track characters,
+    tokens and cache hits. Everything can be exported as JSON or in the
+    Prometheus text format. Profiling, when switched on, captures a cProfile
+    report for blocks wrapped in profile().
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.profiling = False
+        self.started = time.time()
+        self._histograms = {}
+        self._counters = {}
+        self._profiles = deque(maxlen=PROFILE_HISTORY)
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds, **labels):
+        """Record one latency sample for a stage"""
+        if not self.enabled:
+            return
+        key = (stage, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def count(self, name, amount=1, **labels):
+        """Add to a counter"""
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def count_cache(self, cache, hit):
+        """Record one cache lookup outcome"""
+        self.count("cache_lookups", cache=cache, result="hit" if hit else "miss")
+
+    @contextmanager
+    def timer(self, stage, **labels):
+        """Time the enclosed block as one sample of stage; failures are also counted"""
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.count("stage_errors", stage=stage, **labels)
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - started, **labels)
+
+    def timed_iter(self, iterable, stage, **labels):
+        """Yield from iterable, timing only the work done inside it
+
+        Time the consumer spends between items is excluded, so a generator
+        read incrementally by the UI is measured the same as one drained at once.
+        The sample is recorded when the iterator is exhausted or closed.
+        """
+        if not self.enabled:
+            yield from iterable
+            return
+        iterator = iter(iterable)
+        elapsed = 0.0
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    elapsed += time.perf_counter() - started
+                    break
+                except Exception:
+                    elapsed += time.perf_counter() - started
+                    self.count("stage_errors", stage=stage, **labels)
+                    raise
+                elapsed += time.perf_counter() - started
+                yield item
+        finally:
+            self.observe(stage, elapsed, **labels)
+
+    @contextmanager
+    def profile(self, name):
+        """Capture a cProfile report of the enclosed block when profiling is on
+
+        Only the calling thread is profiled, and only one profile can run at a
+        time in a process; overlapping blocks simply run unprofiled.
+        """
+        if not self.profiling:
+            yield
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another session is already being profiled
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            report = io.StringIO()
+            pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(PROFILE_LINES)
+            with self._lock:
+                self._profiles.appendleft({
+                    "name": name,
+                    "at": time.time(),
+                    "seconds": time.perf_counter() - started,
+                    "report": report.getvalue(),
+                })
+
+    def profiles(self):
+        """Most recent profile reports, newest first"""
+        with self._lock:
+            return list(self._profiles)
+
+    def reset(self):
+        """Drop every recorded sample, counter and profile"""
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._profiles.clear()
+            self.started = time.time()
+
+    def summary(self):
+        """One row per timed stage with count, mean and approximate p50/p95 in milliseconds"""
+        with self._lock:
+            rows = []
+            for (stage, label_key), histogram in sorted(self._histograms.items()):
+                p50 = histogram.quantile(0.5)
+                p95 = histogram.quantile(0.95)
+                rows.append({
+                    "stage": stage + _format_labels(label_key),
+                    "count": histogram.count,
+                    "mean_ms": round(histogram.sum / histogram.count * 1000, 1),
+                    "p50_ms": round(p50 * 1000, 1),
+                    "p95_ms": round(p95 * 1000, 1),
+                })
+            return rows
+
+    def cache_hit_rates(self):
+        """Hit rate per cache name, from cache_lookups counters"""
+        totals = {}
+        with self._lock:
+            for (name, label_key), value in self._counters.items():
+                if name != "cache_lookups":
+                    continue
+                labels = dict(label_key)
+                hits, lookups = totals.get(labels["cache"], (0, 0))
+                totals[labels["cache"]] = (hits + (value if labels["result"] == "hit" else 0), lookups + value)
+        return {cache: hits / lookups for cache, (hits, lookups) in totals.items() if lookups}
+
+    def to_dict(self):
+        """Everything recorded so far as plain data"""
+        hit_rates = self.cache_hit_rates()
+        with self._lock:
+            return {
+                "started": self.started,
+                "exported": time.time(),
+                "histograms": [
+                    {
+                        "stage": stage,
+                        "labels": dict(label_key),
+                        "buckets": list(histogram.buckets),
+                        "counts": list(histogram.counts),
+                        "sum": histogram.sum,
+                        "count": histogram.count,
+                    }
+                    for (stage, label_key), histogram in sorted(self._histograms.items())
+                ],
+                "counters": [
+                    {"name": name, "labels": dict(label_key), "value": value}
+                    for (name, label_key), value in sorted(self._counters.items())
+                ],
+                "cache_hit_rates": hit_rates,
+            }
+
+    def to_json(self):
+        """JSON dump of every histogram and counter"""
+        return json.dumps(self.to_dict(), indent=2, ensure_ascii=False)
+
+    def to_prometheus(self):
+        """Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+
+        metric = f"{METRIC_PREFIX}_stage_seconds"
+        if histograms:
+            lines.append(f"# HELP {metric} Latency of each pipeline stage")
+            lines.append(f"# TYPE {metric} histogram")
+        for (stage, label_key), histogram in histograms:
+            label_key = (("stage", stage),) + label_key
+            cumulative = 0
+            for bound, bucket_count in zip(list(histogram.buckets) + ["+Inf"], histogram.counts):
+                cumulative += bucket_count
+                lines.append(f"{metric}_bucket{_format_labels(label_key, [('le', bound)])} {cumulative}")
+            lines.append(f"{metric}_sum{_format_labels(label_key)} {histogram.sum}")
+            lines.append(f"{metric}_count{_format_labels(label_key)} {histogram.count}")
+
+        seen = set()
+        for (name, label_key), value in counters:
+            metric = f"{METRIC_PREFIX}_{name}_total"
+            if metric not in seen:
+                seen.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{_format_labels(label_key)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """Return the process-wide metrics registry, creating it on first use"""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics()
+        return _metrics
@@ -0,0 +1,83 @@
+# pipeline.py - Importable extraction -> translation -> TTS engine shared by the UI and batch runner
+import os
+
+import client_pool
+from file_extraction import count_pages, extract_text, parse_page_ranges, supports_page_ranges
+from translation_engine import DEFAULT_MODEL_NAME, translate_document
+from translation_memory import translate_with_memory
+from tts_engine import synthesize_speech
+
+# Language configuration with TTS support
+SUPPORTED_LANGUAGES = {
+    "Spanish": {"code": "es", "native_name": "Español"},
+    "French": {"code": "fr", "native_name": "Français"},
+    "German": {"code": "de", "native_name": "Deutsch"},
+    "Italian": {"code": "it", "native_name": "Italiano"},
+    "Portuguese": {"code": "pt", "native_name": "Português"},
+    "Russian": {"code": "ru", "native_name": "Русский"},
+    "Japanese": {"code": "ja", "native_name": "日本語"},
+    "Korean": {"code": "ko", "native_name": "한국어"},
+    "Chinese": {"code": "zh", "native_name": "中文"},
+    "Arabic": {"code": "ar", "native_name": "العربية"},
+    "Hindi": {"code": "hi", "native_name": "हिन्दी"},
+    "Dutch": {"code": "nl", "native_name": "Nederlands"},
+    "Polish": {"code": "pl", "native_name": "Polski"},
+    "Turkish": {"code": "tr", "native_name": "Türkçe"},
+    "Swedish": {"code": "sv", "native_name": "Svenska"}
+}
+
+# File extension -> MIME type, matching what Streamlit reports for uploads
+FILE_TYPES = {
+    ".txt": "text/plain",
+    ".pdf": "application/pdf",
+    ".csv": "text/csv",
+    ".xls": "application/vnd.ms-excel",
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+
+def guess_file_type(path):
+    """MIME type for a supported file path, or None"""
+    return FILE_TYPES.get(os.path.splitext(path)[1].lower())
+
+
+def create_model(api_key, model_name=DEFAULT_MODEL_NAME):
+    """Configured Gemini model for api_key, shared through the process-wide client pool"""
+    return client_pool.get_model(api_key, model_name)
+
+
+def extract_file(path, page_spec=None):
+    """Extract text from a file on disk, returning (text, warnings)
+
+    page_spec is a selection like '1-3, 7' and only applies to paged formats.
+    """
+    file_type = guess_file_type(path)
+    if file_type is None:
+        raise ValueError(f"Unsupported file type: {os.path.splitext(path)[1] or path}")
+    with open(path, "rb") as source_file:
+        file_bytes = source_file.read()
+    pages = None
+    if page_spec and supports_page_ranges(file_type):
+        pages = parse_page_ranges(page_spec, count_pages(file_bytes, file_type))
+    return extract_text(file_bytes, file_type, pages=pages)
+
+
+def translate_text(model, text, target_language, cache=None, memory=None, stats=None):
+    """Translate text of any length, through the translation memory when given"""
+    if target_language not in SUPPORTED_LANGUAGES:
+        raise ValueError(f"Unsupported target language: {target_language}")
+    if memory is not None:
+        return translate_with_memory(model, text, target_language, memory, cache=cache, stats=stats)
+    return translate_document(model, text, target_language, cache=cache, stats=stats)
+
+
+def synthesize_text(text, target_language, slow=False, audio_cache=None):
+    """Synthesize MP3 bytes for translated text, through the audio cache when given"""
+    language_code = SUPPORTED_LANGUAGES[target_language]["code"]
+    audio_bytes = audio_cache.get(text, language_code, slow) if audio_cache is not None else None
+    if audio_bytes is None:
+        audio_bytes = synthesize_speech(text, language_code, slow)
+        if audio_cache is not None:
+            audio_cache.put(text, language_code, slow, audio_bytes)
+    return audio_bytes
@@ -0,0 +1,152 @@
+# prompt_packing.py - Pack many short segments into one Gemini request and unpack the results
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from translation_engine import (DEFAULT_MODEL_NAME, MAX_WORKERS, call_with_retry, estimate_tokens,
+                                generate, translate_chunk)
+
+# Packing configuration
+PACK_TOKEN_BUDGET = 2000       # Approximate input tokens per packed request
+MAX_SEGMENTS_PER_BATCH = 100
+DELIMITER_OVERHEAD = 4         # Tokens spent on each segment's marker
+
+# Packing formats
+DELIMITED = "delimited"        # <<<n>>> markers, robust to segments containing newlines
+JSON_ARRAY = "json"            # JSON array in, JSON array out via response_mime_type
+
+_MARKER = re.compile(r'<<<(\d+)>>>[ \t]*\n?(.*?)(?=<<<\d+>>>|\Z)', re.DOTALL)
+_CODE_FENCE = re.compile(r'^```(?:json)?\s*|\s*```$')
+
+
+def pack_segments(segments, token_budget=PACK_TOKEN_BUDGET, max_segments=MAX_SEGMENTS_PER_BATCH):
+    """Group segment indices into batches that fit the token budget"""
+    batches = []
+    current = []
+    current_tokens = 0
+    for index, segment in enumerate(segments):
+        segment_tokens = estimate_tokens(segment) + DELIMITER_OVERHEAD
+        if current and (current_tokens + segment_tokens > token_budget or len(current) >= max_segments):
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append(index)
+        current_tokens += segment_tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def build_packed_prompt(segments, target_language, mode=DELIMITED):
+    """Build one prompt asking for every segment's translation"""
+    if mode == JSON_ARRAY:
+        return (
+            f"Translate each string in this JSON array to {target_language}. "
+            f"Return only a JSON array of exactly {len(segments)} translated strings in the same order:\n"
+            + json.dumps(segments, ensure_ascii=False)
+        )
+    body = "\n".join(f"<<<{index}>>>\n{segment}" for index, segment in enumerate(segments, start=1))
+    return (
+        f"Translate the text after each <<<n>>> marker to {target_language}. "
+        f"Return all {len(segments)} markers unchanged, each followed by only its translation:\n" + body
+    )
+
+
+def parse_packed_response(text, segments, mode=DELIMITED):
+    """Split a packed response into translations of segments, or None if they can't be aligned
+
+    A missing, extra or empty translation for a non-blank segment counts as
+    misaligned, the same as translate_chunk rejecting an empty result.
+    """
+    expected = len(segments)
+    if mode == JSON_ARRAY:
+        try:
+            translations = json.loads(_CODE_FENCE.sub("", text.strip()))
+        except ValueError:
+            return None
+        if (not isinstance(translations, list) or len(translations) != expected
+                or not all(isinstance(item, str) for item in translations)):
+            return None
+        translations = [item.strip() for item in translations]
+    else:
+        numbered = {}
+        for match in _MARKER.finditer(text):
+            numbered[int(match.group(1))] = match.group(2).strip()
+        if sorted(numbered) != list(range(1, expected + 1)):
+            return None
+        translations = [numbered[index] for index in range(1, expected + 1)]
+
+    if any(not translation and segment.strip() for segment, translation in zip(segments, translations)):
+        return None
+    return translations
+
+
+def translate_batch(model, segments, target_language, mode=DELIMITED):
+    """Translate a packed batch, bisecting it when the response can't be aligned
+
+    Returns (translations, request_count).
+    """
+    if len(segments) == 1:
+        return [translate_chunk(model, segments[0], target_language)], 1
+
+    kwargs = {"generation_config": {"response_mime_type": "application/json"}} if mode == JSON_ARRAY else {}
+    response = generate(model, build_packed_prompt(segments, target_language, mode), **kwargs)
+    translations = parse_packed_response(response.text or "", segments, mode)
+    if translations is not None:
+        return translations, 1
+
+    # The model merged, dropped, emptied or renumbered segments; retry each half on its own
+    middle = len(segments) // 2
+    first, first_requests = translate_batch(model, segments[:middle], target_language, mode)
+    second, second_requests = translate_batch(model, segments[middle:], target_language, mode)
+    return first + second, 1 + first_requests + second_requests
+
+
+def translate_segments(model, segments, target_language, token_budget=PACK_TOKEN_BUDGET, mode=DELIMITED,
+                       cache=None, model_name=DEFAULT_MODEL_NAME, max_workers=MAX_WORKERS,
+                       progress_callback=None, stats=None):
+    """Translate many short segments with as few requests as possible
+
+    Duplicate and cached segments are never sent, blank segments are returned
+    unchanged and the rest are packed into token-budgeted batches that run
+    concurrently. Returns translations aligned with segments; 'cache_hits',
+    'cache_misses' and 'requests' are added to the optional stats dict.
+    """
+    translated = {}
+    pending = []
+    cache_hits = 0
+    for segment in dict.fromkeys(segments):
+        if not segment.strip():
+            translated[segment] = segment
+            continue
+        cached = cache.get(segment, target_language, model_name) if cache is not None else None
+        if cached is not None:
+            translated[segment] = cached
+            cache_hits += 1
+        else:
+            pending.append(segment)
+
+    requests = 0
+    batches = [[pending[index] for index in batch] for batch in pack_segments(pending, token_budget)]
+    if batches:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(batches)))) as executor:
+            futures = {
+                executor.submit(call_with_retry, translate_batch, model, batch, target_language, mode): batch
+                for batch in batches
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                batch = futures[future]
+                translations, batch_requests = future.result()
+                requests += batch_requests
+                for segment, translation in zip(batch, translations):
+                    translated[segment] = translation
+                    if cache is not None:
+                        cache.put(segment, target_language, model_name, translation)
+                if progress_callback:
+                    progress_callback(done, len(batches))
+
+    if stats is not None:
+        stats["cache_hits"] = stats.get("cache_hits", 0) + cache_hits
+        stats["cache_misses"] = stats.get("cache_misses", 0) + len(pending)
+        stats["requests"] = stats.get("requests", 0) + requests
+    return [translated[segment] for segment in segments]
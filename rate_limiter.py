@@ -0,0 +1,192 @@
+# rate_limiter.py - Process-wide token-bucket scheduler with adaptive concurrency for Gemini calls
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+# Scheduler configuration (defaults sized for a paid-tier gemini-1.5-flash key)
+REQUESTS_PER_MINUTE = 1000
+TOKENS_PER_MINUTE = 1_000_000
+MAX_CONCURRENCY = 32          # Upper bound for the adaptive concurrency limit
+MIN_CONCURRENCY = 1
+INITIAL_CONCURRENCY = 8
+MAX_RETRIES = 5               # Retries per call on 429/quota responses
+BASE_BACKOFF = 1.0            # Seconds, doubled per retry before jitter
+MAX_BACKOFF = 60.0
+
+_RATE_LIMIT_MARKERS = ("429", "quota", "rate limit", "resource exhausted", "resourceexhausted", "too many requests")
+
+
+def is_rate_limit_message(message):
+    """Whether an error message describes a 429/quota response"""
+    message = message.lower()
+    return any(marker in message for marker in _RATE_LIMIT_MARKERS)
+
+
+def is_rate_limit_error(error):
+    """Whether an exception is a 429/quota response"""
+    return is_rate_limit_message(f"{type(error).__name__} {error}")
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at rate_per_minute"""
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        """Add tokens accrued since the last update"""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_second)
+        self._updated = now
+
+    def acquire(self, amount=1):
+        """Block until amount tokens are available, then take them"""
+        # A request larger than the bucket would wait forever, cap it at a full bucket
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                wait = (amount - self._tokens) / self.rate_per_second
+            time.sleep(wait)
+
+    def available(self):
+        """Tokens currently available"""
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+class GeminiScheduler:
+    """Shared gate for every Gemini request in the process
+
+    Requests wait for a concurrency slot and for request/token budget. The
+    concurrency limit grows additively on success and halves on 429/quota
+    responses, which also pause every caller for a jittered backoff, so
+    throughput settles just under the quota instead of oscillating.
+    """
+
+    def __init__(self, requests_per_minute=REQUESTS_PER_MINUTE, tokens_per_minute=TOKENS_PER_MINUTE,
+                 max_concurrency=MAX_CONCURRENCY, min_concurrency=MIN_CONCURRENCY,
+                 initial_concurrency=INITIAL_CONCURRENCY, max_retries=MAX_RETRIES,
+                 base_backoff=BASE_BACKOFF, max_backoff=MAX_BACKOFF):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.concurrency_limit = float(initial_concurrency)
+        self._active = 0
+        self._cooldown_until = 0.0
+        self._consecutive_limits = 0
+        self._condition = threading.Condition()
+        self.successes = 0
+        self.rate_limited = 0
+
+    def configure(self, requests_per_minute, tokens_per_minute):
+        """Replace the request and token budgets"""
+        with self._condition:
+            self.requests_per_minute = requests_per_minute
+            self.tokens_per_minute = tokens_per_minute
+            self.requests = TokenBucket(requests_per_minute)
+            self.tokens = TokenBucket(tokens_per_minute)
+
+    def backoff_delay(self, attempt):
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, min(self.max_backoff, self.base_backoff * (2 ** attempt)))
+
+    def _acquire_slot(self):
+        """Wait for a free concurrency slot outside any cooldown"""
+        with self._condition:
+            while True:
+                wait = self._cooldown_until - time.monotonic()
+                if wait <= 0 and self._active < int(self.concurrency_limit):
+                    self._active += 1
+                    return
+                self._condition.wait(timeout=wait if wait > 0 else None)
+
+    def _release_slot(self):
+        """Return a concurrency slot"""
+        with self._condition:
+            self._active -= 1
+            self._condition.notify_all()
+
+    def _on_success(self):
+        """Additive increase of the concurrency limit"""
+        with self._condition:
+            self.successes += 1
+            self._consecutive_limits = 0
+            self.concurrency_limit = min(self.max_concurrency, self.concurrency_limit + 1.0 / self.concurrency_limit)
+            self._condition.notify_all()
+
+    def _on_rate_limited(self):
+        """Multiplicative decrease and a shared cooldown for every caller"""
+        with self._condition:
+            self.rate_limited += 1
+            self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit / 2)
+            delay = self.backoff_delay(self._consecutive_limits)
+            self._consecutive_limits += 1
+            self._cooldown_until = max(self._cooldown_until, time.monotonic() + delay)
+
+    @contextmanager
+    def slot(self, tokens=1):
+        """Hold a concurrency slot and budget for one request, recording its outcome"""
+        self._acquire_slot()
+        try:
+            self.requests.acquire(1)
+            self.tokens.acquire(tokens)
+            yield
+        except Exception as e:
+            if is_rate_limit_error(e):
+                self._on_rate_limited()
+            raise
+        else:
+            self._on_success()
+        finally:
+            self._release_slot()
+
+    def call(self, func, *args, tokens=1, **kwargs):
+        """Run func under the scheduler, retrying 429/quota errors with backoff"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self.slot(tokens):
+                    return func(*args, **kwargs)
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == self.max_retries:
+                    raise
+                time.sleep(self.backoff_delay(attempt))
+
+    def stats(self):
+        """Current scheduler state for display"""
+        with self._condition:
+            return {
+                "concurrency_limit": int(self.concurrency_limit),
+                "active": self._active,
+                "successes": self.successes,
+                "rate_limited": self.rate_limited,
+                "cooling_down": self._cooldown_until > time.monotonic(),
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Return the process-wide scheduler, creating it on first use"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = GeminiScheduler()
+        return _scheduler
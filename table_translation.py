@@ -0,0 +1,123 @@
+# table_translation.py - Structure-preserving, deduplicated translation of CSV/Excel tables
+import io
+
+# pandas is imported where it's used, so text-only sessions never load it
+from file_extraction import EXCEL_TYPES
+from metrics import get_metrics
+from prompt_packing import translate_segments
+from translation_engine import DEFAULT_MODEL_NAME
+
+TABLE_TYPES = ["text/csv"] + EXCEL_TYPES
+
+# Table translation configuration
+NON_TEXT_THRESHOLD = 0.9       # Skip columns where this share of values parses as number/date
+
+
+def load_table(file_bytes, file_type):
+    """Read an uploaded CSV or Excel file into a DataFrame"""
+    import pandas as pd
+    if file_type == "text/csv":
+        return pd.read_csv(io.BytesIO(file_bytes))
+    if file_type in EXCEL_TYPES:
+        return pd.read_excel(io.BytesIO(file_bytes))
+    raise ValueError(f"Unsupported table type: {file_type}")
+
+
+def _is_mostly(values, parser):
+    """Whether at least NON_TEXT_THRESHOLD of values parse with parser"""
+    parsed = parser(values)
+    return parsed.notna().mean() >= NON_TEXT_THRESHOLD
+
+
+def _parse_dates(values):
+    """Parse values as dates, NaT where they aren't"""
+    import pandas as pd
+    try:
+        return pd.to_datetime(values, errors="coerce", format="mixed")
+    except (TypeError, ValueError):
+        return pd.to_datetime(values, errors="coerce")
+
+
+def translatable_columns(df):
+    """Columns holding free text, skipping numeric, boolean and date columns"""
+    import pandas as pd
+    columns = []
+    for column in df.columns:
+        series = df[column]
+        if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+            continue
+        values = series.dropna().astype(str).str.strip()
+        values = values[values != ""]
+        if values.empty:
+            continue
+        sample = values.drop_duplicates().head(200)
+        if _is_mostly(sample, lambda v: pd.to_numeric(v, errors="coerce")):
+            continue
+        if _is_mostly(sample, _parse_dates):
+            continue
+        columns.append(column)
+    return columns
+
+
+def collect_unique_values(df, columns):
+    """Unique text values per column, in first-seen order"""
+    unique_values = {}
+    for column in columns:
+        values = df[column].dropna().astype(str)
+        # Values without letters (codes, amounts, IDs) have nothing to translate
+        unique_values[column] = [value for value in values.unique() if any(ch.isalpha() for ch in value)]
+    return unique_values
+
+
+def translate_values(model, values, target_language, cache=None, model_name=DEFAULT_MODEL_NAME,
+                     progress_callback=None, stats=None):
+    """Translate unique values with packed requests, returning {value: translation}"""
+    translations = translate_segments(
+        model, values, target_language, cache=cache, model_name=model_name,
+        progress_callback=progress_callback, stats=stats
+    )
+    return dict(zip(values, translations))
+
+
+def translate_table(model, df, target_language, cache=None, model_name=DEFAULT_MODEL_NAME,
+                    progress_callback=None, stats=None):
+    """Translate the text columns of a DataFrame, preserving its rows and columns
+
+    Each distinct value is translated once, packed with other values into as
+    few requests as possible, and mapped back onto every cell that holds it.
+    Returns (translated_df, translated_columns).
+    """
+    import pandas as pd
+    columns = translatable_columns(df)
+    unique_values = collect_unique_values(df, columns)
+    # The same label can appear in several columns, translate it only once
+    all_values = list(dict.fromkeys(value for values in unique_values.values() for value in values))
+    if stats is not None:
+        stats["cells"] = int(sum(df[column].notna().sum() for column in columns))
+        stats["unique_values"] = len(all_values)
+
+    mapping = translate_values(
+        model, all_values, target_language, cache=cache, model_name=model_name,
+        progress_callback=progress_callback, stats=stats
+    )
+
+    translated = df.copy()
+    for column in columns:
+        translated[column] = df[column].map(
+            lambda value: mapping.get(str(value), value) if pd.notna(value) else value
+        )
+    return translated, columns
+
+
+def to_csv_bytes(df):
+    """Serialize a DataFrame as UTF-8 CSV for download"""
+    with get_metrics().timer("download_prep", format="csv"):
+        return df.to_csv(index=False).encode("utf-8-sig")
+
+
+def to_excel_bytes(df):
+    """Serialize a DataFrame as an .xlsx workbook for download"""
+    buffer = io.BytesIO()
+    with get_metrics().timer("download_prep", format="xlsx"):
+        df.to_excel(buffer, index=False, engine="openpyxl")
+    return buffer.getvalue()
@@ -0,0 +1,138 @@
+# translation_cache.py - Content-addressed translation cache (in-memory LRU + on-disk SQLite)
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from metrics import get_metrics
+
+# Cache configuration
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+CACHE_DB_PATH = os.path.join(CACHE_DIR, "translations.sqlite3")
+MEMORY_ENTRIES = 512                  # Entries kept in the in-process LRU tier
+MAX_DISK_ENTRIES = 50_000             # Rows kept in the SQLite tier
+TTL_SECONDS = 30 * 24 * 60 * 60       # Disk entries expire after 30 days
+EVICTION_INTERVAL = 100               # Run disk eviction every N writes
+
+
+def normalize_text(text):
+    """Normalize text so trivially different inputs share a cache entry"""
+    text = unicodedata.normalize("NFC", text)
+    return " ".join(text.split())
+
+
+def make_cache_key(text, target_language, model_name):
+    """Build a content hash from normalized text, target language and model"""
+    payload = "\0".join([normalize_text(text), target_language, model_name])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TranslationCache:
+    """Two-tier translation cache shared by all sessions in the process"""
+
+    def __init__(self, db_path=CACHE_DB_PATH, memory_entries=MEMORY_ENTRIES,
+                 max_disk_entries=MAX_DISK_ENTRIES, ttl_seconds=TTL_SECONDS):
+        self.db_path = db_path
+        self.memory_entries = memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            "key TEXT PRIMARY KEY, translation TEXT NOT NULL, "
+            "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_translations_last_access ON translations (last_access)"
+        )
+        self._conn.commit()
+
+    def _remember(self, key, translation):
+        """Insert into the memory tier, evicting the least recently used entry"""
+        self._memory[key] = translation
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, text, target_language, model_name):
+        """Return a cached translation or None"""
+        key = make_cache_key(text, target_language, model_name)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                get_metrics().count_cache("translation", True)
+                return self._memory[key]
+
+            now = time.time()
+            row = self._conn.execute(
+                "SELECT translation FROM translations WHERE key = ? AND created_at >= ?",
+                (key, now - self.ttl_seconds),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                get_metrics().count_cache("translation", False)
+                return None
+
+            self._conn.execute("UPDATE translations SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self._remember(key, row[0])
+            self.hits += 1
+            get_metrics().count_cache("translation", True)
+            return row[0]
+
+    def put(self, text, target_language, model_name, translation):
+        """Store a translation in both tiers; empty translations are never stored"""
+        if not translation or not translation.strip():
+            return
+        key = make_cache_key(text, target_language, model_name)
+        now = time.time()
+        with self._lock:
+            self._remember(key, translation)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO translations (key, translation, created_at, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, translation, now, now),
+            )
+            self._writes += 1
+            if self._writes % EVICTION_INTERVAL == 0:
+                self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        """Drop expired rows, then the least recently used rows over the size cap"""
+        self._conn.execute("DELETE FROM translations WHERE created_at < ?", (now - self.ttl_seconds,))
+        self._conn.execute(
+            "DELETE FROM translations WHERE key IN ("
+            "SELECT key FROM translations ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,),
+        )
+
+    def clear(self):
+        """Remove every cached translation"""
+        with self._lock:
+            self._memory.clear()
+            self._conn.execute("DELETE FROM translations")
+            self._conn.commit()
+
+    def stats(self):
+        """Return process-wide cache counters"""
+        with self._lock:
+            disk_entries = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+                "disk_entries": disk_entries,
+            }
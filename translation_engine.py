@@ -0,0 +1,292 @@
+# translation_engine.py - Chunked, concurrent translation pipeline for long documents
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from metrics import get_metrics
+from rate_limiter import get_scheduler, is_rate_limit_error
+
+# Pipeline configuration
+DEFAULT_MODEL_NAME = 'gemini-1.5-flash'
+CHUNK_TOKEN_BUDGET = 1500     # Approximate input tokens per request
+MAX_WORKERS = 8               # Concurrent Gemini requests per document
+MAX_RETRIES = 3               # Attempts per chunk before giving up
+RETRY_BASE_DELAY = 1.0        # Seconds, doubled after every failed attempt
+
+# Paragraph breaks; Latin, Devanagari (danda) and Arabic/Urdu sentence ends followed by whitespace; CJK sentence ends
+_SEGMENT_BOUNDARY = re.compile(r'\n\s*\n|(?<=[.!?\u0964\u0965\u061F\u06D4])\s+|(?<=[。！？])\s*')
+
+
+def estimate_tokens(text):
+    """Roughly estimate the token count of text"""
+    # Latin text averages ~4 characters per token, other scripts ~1 per character
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return max(1, ascii_chars // 4 + (len(text) - ascii_chars))
+
+
+def split_segments(text):
+    """Split text into sentence segments, keeping trailing whitespace on each"""
+    segments = []
+    start = 0
+    for match in _SEGMENT_BOUNDARY.finditer(text):
+        end = match.end()
+        if end > start:
+            segments.append(text[start:end])
+            start = end
+    if start < len(text):
+        segments.append(text[start:])
+    return segments
+
+
+def _budget_prefix(text, token_budget):
+    """Length of the longest prefix of text whose estimate_tokens fits token_budget, at least 1"""
+    ascii_chars = 0
+    other_chars = 0
+    for index, ch in enumerate(text):
+        if ord(ch) < 128:
+            ascii_chars += 1
+        else:
+            other_chars += 1
+        if ascii_chars // 4 + other_chars > token_budget:
+            return max(1, index)
+    return len(text)
+
+
+def _hard_split(segment, token_budget):
+    """Split a single oversized segment at word boundaries, cutting by estimated tokens"""
+    pieces = []
+    while estimate_tokens(segment) > token_budget and len(segment) > 1:
+        limit = _budget_prefix(segment, token_budget)
+        # Cut after the last space that fits, or mid-word for scripts without spaces
+        cut = segment.rfind(' ', 0, limit) + 1 or limit
+        pieces.append(segment[:cut])
+        segment = segment[cut:]
+    if segment:
+        pieces.append(segment)
+    return pieces
+
+
+def join_separator(whitespace):
+    """Normalize the whitespace that followed a chunk in the source text"""
+    if whitespace.count('\n') >= 2:
+        return "\n\n"
+    if '\n' in whitespace:
+        return "\n"
+    if whitespace:
+        return " "
+    return ""
+
+
+def chunk_text(text, token_budget=CHUNK_TOKEN_BUDGET):
+    """Pack sentence segments into token-budgeted chunks
+
+    Returns a list of (chunk_text, separator) tuples where separator is the
+    whitespace to put back after the chunk's translation when reassembling.
+    """
+    segments = []
+    for segment in split_segments(text):
+        if estimate_tokens(segment) > token_budget:
+            segments.extend(_hard_split(segment, token_budget))
+        else:
+            segments.append(segment)
+
+    chunks = []
+    current = []
+    current_tokens = 0
+    for segment in segments:
+        segment_tokens = estimate_tokens(segment)
+        if current and current_tokens + segment_tokens > token_budget:
+            chunks.append("".join(current))
+            current = []
+            current_tokens = 0
+        current.append(segment)
+        current_tokens += segment_tokens
+    if current:
+        chunks.append("".join(current))
+
+    result = []
+    for chunk in chunks:
+        body = chunk.rstrip()
+        if body.strip():
+            result.append((body, join_separator(chunk[len(body):])))
+    return result
+
+
+def build_prompt(text, target_language):
+    """Build the translation prompt sent to Gemini"""
+    return f"Translate this to {target_language}, return only the translation:\n{text}"
+
+
+def call_with_retry(func, *args, retries=MAX_RETRIES, base_delay=RETRY_BASE_DELAY):
+    """Call func, retrying with exponential backoff on failure
+
+    Rate-limit errors are not retried here, the scheduler already retried them.
+    """
+    for attempt in range(retries):
+        try:
+            return func(*args)
+        except Exception as e:
+            if attempt == retries - 1 or is_rate_limit_error(e):
+                raise
+            time.sleep(base_delay * (2 ** attempt))
+
+
+def generate(model, prompt, **kwargs):
+    """Send a prompt to Gemini through the process-wide rate limiter
+
+    'gemini_call' times the API call alone, 'gemini_request' also includes
+    waiting on the rate limiter and retries.
+    """
+    metrics = get_metrics()
+    prompt_tokens = estimate_tokens(prompt)
+
+    def timed_call():
+        with metrics.timer("gemini_call"):
+            return model.generate_content(prompt, **kwargs)
+
+    with metrics.timer("gemini_request"):
+        # Budget for the prompt plus a translation of roughly the same size
+        response = get_scheduler().call(timed_call, tokens=2 * prompt_tokens)
+    usage = getattr(response, "usage_metadata", None)
+    metrics.count("gemini_prompt_characters", len(prompt))
+    metrics.count("gemini_prompt_tokens", getattr(usage, "prompt_token_count", None) or prompt_tokens)
+    metrics.count("gemini_output_tokens", getattr(usage, "candidates_token_count", None) or 0)
+    return response
+
+
+def translate_chunk(model, text, target_language):
+    """Translate a single chunk with one Gemini request"""
+    response = generate(model, build_prompt(text, target_language))
+    if not response.text or not response.text.strip():
+        raise ValueError("Translation returned empty result")
+    return response.text.strip()
+
+
+def translate_document(model, text, target_language, token_budget=CHUNK_TOKEN_BUDGET,
+                       max_workers=MAX_WORKERS, progress_callback=None, cache=None,
+                       model_name=DEFAULT_MODEL_NAME, stats=None):
+    """Translate text of any length by chunking and translating chunks concurrently
+
+    progress_callback(done, total) is called from the calling thread after
+    each chunk finishes, so it is safe to update Streamlit widgets from it.
+    When a TranslationCache is given, cached chunks skip the API entirely and
+    'cache_hits'/'cache_misses' are added to the optional stats dict.
+    """
+    chunks = chunk_text(text, token_budget)
+    if not chunks:
+        raise ValueError("No text to translate")
+
+    translations = [None] * len(chunks)
+    pending = []
+    cache_hits = 0
+    for index, (chunk, _) in enumerate(chunks):
+        cached = cache.get(chunk, target_language, model_name) if cache is not None else None
+        if cached is not None:
+            translations[index] = cached
+            cache_hits += 1
+        else:
+            pending.append(index)
+    if stats is not None:
+        stats["cache_hits"] = stats.get("cache_hits", 0) + cache_hits
+        stats["cache_misses"] = stats.get("cache_misses", 0) + len(pending)
+
+    done = len(chunks) - len(pending)
+    if progress_callback and done:
+        progress_callback(done, len(chunks))
+
+    workers = max(1, min(max_workers, len(pending)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(call_with_retry, translate_chunk, model, chunks[index][0], target_language): index
+            for index in pending
+        }
+        try:
+            for future in as_completed(futures):
+                index = futures[future]
+                translations[index] = future.result()
+                if cache is not None:
+                    cache.put(chunks[index][0], target_language, model_name, translations[index])
+                done += 1
+                if progress_callback:
+                    progress_callback(done, len(chunks))
+        except Exception:
+            # Don't keep spending API calls on a document that already failed
+            for future in futures:
+                future.cancel()
+            raise
+
+    # Reassemble in source order with the original paragraph/sentence spacing
+    parts = []
+    for translation, (_, separator) in zip(translations, chunks):
+        parts.append(translation)
+        parts.append(separator)
+    return "".join(parts).strip()
+
+
+def stream_chunk(model, text, target_language, retries=MAX_RETRIES, base_delay=RETRY_BASE_DELAY):
+    """Yield translated fragments for one chunk as Gemini produces them
+
+    Failures are retried only until the first fragment has been yielded,
+    since partial output can't be taken back from the caller.
+    """
+    scheduler = get_scheduler()
+    metrics = get_metrics()
+    prompt = build_prompt(text, target_language)
+    prompt_tokens = estimate_tokens(prompt)
+    for attempt in range(retries):
+        emitted = False
+        try:
+            # The scheduler slot is held for the whole stream
+            with scheduler.slot(tokens=2 * prompt_tokens):
+                started = time.perf_counter()
+                response = model.generate_content(prompt, stream=True)
+                for part in response:
+                    if part.text:
+                        if not emitted:
+                            metrics.observe("gemini_first_fragment", time.perf_counter() - started)
+                        emitted = True
+                        yield part.text
+                metrics.observe("gemini_stream", time.perf_counter() - started)
+            metrics.count("gemini_prompt_characters", len(prompt))
+            metrics.count("gemini_prompt_tokens", prompt_tokens)
+            return
+        except Exception as e:
+            if emitted or attempt == retries - 1:
+                raise
+            if is_rate_limit_error(e):
+                time.sleep(scheduler.backoff_delay(attempt))
+            else:
+                time.sleep(base_delay * (2 ** attempt))
+
+
+def stream_document(model, text, target_language, token_budget=CHUNK_TOKEN_BUDGET, cache=None,
+                    model_name=DEFAULT_MODEL_NAME, stats=None):
+    """Yield translated fragments for a whole document in source order
+
+    Chunks are streamed one after another; cached chunks are yielded whole.
+    """
+    chunks = chunk_text(text, token_budget)
+    if not chunks:
+        raise ValueError("No text to translate")
+
+    for index, (chunk, separator) in enumerate(chunks):
+        cached = cache.get(chunk, target_language, model_name) if cache is not None else None
+        if stats is not None:
+            key = "cache_hits" if cached is not None else "cache_misses"
+            stats[key] = stats.get(key, 0) + 1
+
+        if cached is not None:
+            yield cached
+        else:
+            pieces = []
+            for fragment in stream_chunk(model, chunk, target_language):
+                pieces.append(fragment)
+                yield fragment
+            translation = "".join(pieces).strip()
+            if not translation:
+                raise ValueError("Translation returned empty result")
+            if cache is not None:
+                cache.put(chunk, target_language, model_name, translation)
+
+        if index < len(chunks) - 1:
+            yield separator
@@ -0,0 +1,234 @@
+# translation_memory.py - Persistent segment-level translation memory with a MinHash fuzzy index
+import difflib
+import os
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from metrics import get_metrics
+from prompt_packing import translate_segments
+from translation_cache import CACHE_DIR, make_cache_key, normalize_text
+from translation_engine import (DEFAULT_MODEL_NAME, MAX_WORKERS, call_with_retry, generate,
+                                join_separator, split_segments)
+
+# Memory configuration
+MEMORY_DB_PATH = os.path.join(CACHE_DIR, "translation_memory.sqlite3")
+FUZZY_THRESHOLD = 0.9          # Minimum similarity for a near match to be used as a hint
+SHINGLE_SIZE = 3               # Character n-grams, so CJK text is indexed as well as Latin
+NUM_BANDS = 4                  # LSH bands x rows = MinHash signature length
+ROWS_PER_BAND = 4
+MAX_CANDIDATES = 20            # Candidates verified per lookup, most shared bands first
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20250914)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_BANDS * ROWS_PER_BAND)
+]
+
+
+def _shingles(text):
+    """Character n-grams of the normalized, lower-cased text"""
+    text = normalize_text(text).lower()
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def minhash_signature(text):
+    """MinHash signature approximating the Jaccard similarity of shingle sets"""
+    hashes = [zlib.crc32(shingle.encode("utf-8")) for shingle in _shingles(text)]
+    return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def band_keys(text, target_language):
+    """LSH bucket keys; similar sources share at least one bucket with high probability"""
+    signature = minhash_signature(text)
+    keys = []
+    for band in range(NUM_BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        keys.append(f"{target_language}:{band}:{zlib.crc32(repr(rows).encode('ascii')):08x}")
+    return keys
+
+
+def similarity(a, b):
+    """Edit-based similarity of two segments between 0 and 1"""
+    return difflib.SequenceMatcher(None, normalize_text(a), normalize_text(b), autojunk=False).ratio()
+
+
+class TranslationMemory:
+    """Source/target segment pairs per target language with exact and fuzzy lookup"""
+
+    def __init__(self, db_path=MEMORY_DB_PATH, fuzzy_threshold=FUZZY_THRESHOLD):
+        self.db_path = db_path
+        self.fuzzy_threshold = fuzzy_threshold
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS segments ("
+            "id INTEGER PRIMARY KEY, key TEXT UNIQUE NOT NULL, target_language TEXT NOT NULL, "
+            "source TEXT NOT NULL, target TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS bands (band TEXT NOT NULL, segment_id INTEGER NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_bands_band ON bands (band)")
+        self._conn.commit()
+
+    def lookup(self, source, target_language):
+        """Find a stored translation for source
+
+        Returns (match_type, target, similarity, matched_source) where
+        match_type is 'exact', 'fuzzy' or None.
+        """
+        key = make_cache_key(source, target_language, "")
+        with self._lock:
+            row = self._conn.execute("SELECT target, source FROM segments WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                return "exact", row[0], 1.0, row[1]
+
+            # Sharing more bands means a closer signature, so the likeliest matches survive the limit
+            keys = band_keys(source, target_language)
+            candidates = self._conn.execute(
+                f"SELECT s.source, s.target FROM bands b JOIN segments s ON s.id = b.segment_id "
+                f"WHERE b.band IN ({','.join('?' * len(keys))}) "
+                f"GROUP BY b.segment_id ORDER BY COUNT(*) DESC, s.updated_at DESC LIMIT ?",
+                (*keys, MAX_CANDIDATES),
+            ).fetchall()
+
+        best = (None, None, 0.0, None)
+        for candidate_source, candidate_target in candidates:
+            score = similarity(source, candidate_source)
+            if score >= self.fuzzy_threshold and score > best[2]:
+                best = ("fuzzy", candidate_target, score, candidate_source)
+        return best
+
+    def add(self, source, target_language, target):
+        """Store or update a segment pair"""
+        key = make_cache_key(source, target_language, "")
+        keys = band_keys(source, target_language)
+        with self._lock:
+            existing = self._conn.execute("SELECT id FROM segments WHERE key = ?", (key,)).fetchone()
+            if existing is not None:
+                self._conn.execute(
+                    "UPDATE segments SET target = ?, updated_at = ? WHERE id = ?",
+                    (target, time.time(), existing[0]),
+                )
+            else:
+                cursor = self._conn.execute(
+                    "INSERT INTO segments (key, target_language, source, target, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, target_language, source.strip(), target, time.time()),
+                )
+                self._conn.executemany(
+                    "INSERT INTO bands (band, segment_id) VALUES (?, ?)",
+                    [(band, cursor.lastrowid) for band in keys],
+                )
+            self._conn.commit()
+
+    def size(self, target_language=None):
+        """Number of stored segment pairs"""
+        with self._lock:
+            if target_language is None:
+                return self._conn.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM segments WHERE target_language = ?", (target_language,)
+            ).fetchone()[0]
+
+
+def build_hint_prompt(text, target_language, matched_source, matched_target):
+    """Translation prompt carrying a near match from the memory as a hint"""
+    return (
+        f"Translate this to {target_language}, return only the translation. "
+        f"A very similar sentence was previously translated; reuse its wording where it still applies.\n"
+        f"Previous source: {matched_source}\n"
+        f"Previous translation: {matched_target}\n"
+        f"Text to translate:\n{text}"
+    )
+
+
+def translate_with_hint(model, text, target_language, matched_source, matched_target):
+    """Translate one segment with a fuzzy match as guidance"""
+    response = generate(model, build_hint_prompt(text, target_language, matched_source, matched_target))
+    if not response.text or not response.text.strip():
+        raise ValueError("Translation returned empty result")
+    return response.text.strip()
+
+
+def translate_with_memory(model, text, target_language, memory, cache=None, model_name=DEFAULT_MODEL_NAME,
+                          max_workers=MAX_WORKERS, stats=None):
+    """Translate text sentence by sentence, reusing the translation memory
+
+    Exact matches cost nothing, near matches are sent with the stored
+    translation as a hint, and only new sentences are packed into regular
+    requests. New pairs are added to the memory. 'memory_exact',
+    'memory_fuzzy' and 'memory_new' counts are added to the optional stats
+    dict, and 'memory_fuzzy_matches' lists (sentence, similarity) pairs for review.
+    """
+    sentences = split_segments(text)
+    bodies = [sentence.strip() for sentence in sentences]
+    translations = [None] * len(sentences)
+    exact = 0
+    fuzzy = []
+    new = []
+    for index, body in enumerate(bodies):
+        if not body:
+            translations[index] = ""
+            continue
+        match_type, target, score, matched_source = memory.lookup(body, target_language)
+        if match_type == "exact":
+            translations[index] = target
+            exact += 1
+        elif match_type == "fuzzy":
+            fuzzy.append((index, target, score, matched_source))
+        else:
+            new.append(index)
+
+    # Near matches: one hinted request each
+    if fuzzy:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(fuzzy)))) as executor:
+            futures = {
+                executor.submit(
+                    call_with_retry, translate_with_hint, model, bodies[index], target_language,
+                    matched_source, target
+                ): index
+                for index, target, _, matched_source in fuzzy
+            }
+            for future in as_completed(futures):
+                translations[futures[future]] = future.result()
+
+    # New sentences: packed into as few requests as possible
+    if new:
+        packed = translate_segments(
+            model, [bodies[index] for index in new], target_language,
+            cache=cache, model_name=model_name, max_workers=max_workers, stats=stats
+        )
+        for index, translation in zip(new, packed):
+            translations[index] = translation
+
+    for index, _, _, _ in fuzzy:
+        memory.add(bodies[index], target_language, translations[index])
+    for index in new:
+        memory.add(bodies[index], target_language, translations[index])
+
+    metrics = get_metrics()
+    metrics.count("memory_lookups", exact, result="exact")
+    metrics.count("memory_lookups", len(fuzzy), result="fuzzy")
+    metrics.count("memory_lookups", len(new), result="new")
+    if stats is not None:
+        stats["memory_exact"] = stats.get("memory_exact", 0) + exact
+        stats["memory_fuzzy"] = stats.get("memory_fuzzy", 0) + len(fuzzy)
+        stats["memory_new"] = stats.get("memory_new", 0) + len(new)
+        stats.setdefault("memory_fuzzy_matches", []).extend(
+            (bodies[index], score) for index, _, score, _ in fuzzy
+        )
+
+    # Reassemble with the original sentence and paragraph spacing
+    parts = []
+    for sentence, translation in zip(sentences, translations):
+        parts.append(translation)
+        parts.append(join_separator(sentence[len(sentence.rstrip()):]))
+    return "".join(parts).strip()
@@ -0,0 +1,163 @@
+# tts_engine.py - Parallel segmented TTS synthesis with in-order MP3 assembly
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+from client_pool import create_tts
+from metrics import get_metrics
+from translation_engine import split_segments
+
+# Synthesis configuration
+SEGMENT_MAX_CHARS = 300       # gTTS fetches ~100 characters per request, so ~3 requests per segment
+FIRST_SEGMENT_MAX_CHARS = 100 # Keep the first segment to a single request for fast first audio
+MAX_WORKERS = 6               # Concurrent gTTS segments per text
+
+
+def _split_long(sentence, max_chars):
+    """Split a sentence longer than max_chars at whitespace, cutting hard only where there is none"""
+    pieces = []
+    while len(sentence) > max_chars:
+        window = sentence[:max_chars + 1]
+        cut = next((index for index in range(len(window) - 1, 0, -1) if window[index].isspace()), 0)
+        if cut <= 0:
+            cut = max_chars
+        pieces.append(sentence[:cut])
+        sentence = sentence[cut:]
+    if sentence:
+        pieces.append(sentence)
+    return pieces
+
+
+def segment_text(text, max_chars=SEGMENT_MAX_CHARS, first_max_chars=FIRST_SEGMENT_MAX_CHARS):
+    """Group sentences into TTS segments, keeping the first segment short"""
+    segments = []
+    current = ""
+    sentences = (piece for sentence in split_segments(text) for piece in _split_long(sentence, max_chars))
+    for sentence in sentences:
+        limit = first_max_chars if not segments else max_chars
+        if current and len(current) + len(sentence) > limit:
+            segments.append(current.strip())
+            current = ""
+        current += sentence
+    if current.strip():
+        segments.append(current.strip())
+    return [segment for segment in segments if segment]
+
+
+def _strip_id3(audio_bytes, keep_header):
+    """Remove ID3 tags so concatenated segments form one continuous MP3 stream"""
+    if not keep_header and audio_bytes[:3] == b"ID3" and len(audio_bytes) >= 10:
+        # ID3v2 size is a 28-bit syncsafe integer, excluding the 10-byte header
+        size = 0
+        for byte in audio_bytes[6:10]:
+            size = (size << 7) | (byte & 0x7F)
+        footer = 10 if audio_bytes[5] & 0x10 else 0
+        audio_bytes = audio_bytes[10 + size + footer:]
+    if len(audio_bytes) >= 128 and audio_bytes[-128:-125] == b"TAG":
+        # ID3v1 trailer
+        audio_bytes = audio_bytes[:-128]
+    return audio_bytes
+
+
+def synthesize_segment(text, language_code, slow=False):
+    """Synthesize one segment to MP3 bytes"""
+    metrics = get_metrics()
+    with metrics.timer("tts_segment", language=language_code):
+        tts = create_tts(text, language_code, slow)
+        audio_buffer = io.BytesIO()
+        tts.write_to_fp(audio_buffer)
+    metrics.count("tts_characters", len(text), language=language_code)
+    return audio_buffer.getvalue()
+
+
+def iter_synthesized_segments(text, language_code, slow=False, max_workers=MAX_WORKERS):
+    """Synthesize segments concurrently and yield their MP3 bytes in order
+
+    The first segment is yielded as soon as it is ready, while later segments
+    keep synthesizing in the background.
+    """
+    segments = segment_text(text)
+    if not segments:
+        raise ValueError("No text to synthesize")
+
+    workers = max(1, min(max_workers, len(segments)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(synthesize_segment, segment, language_code, slow) for segment in segments]
+        try:
+            for index, future in enumerate(futures):
+                yield _strip_id3(future.result(), keep_header=index == 0)
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def synthesize_speech(text, language_code, slow=False, max_workers=MAX_WORKERS, on_first_segment=None):
+    """Synthesize text of any length into a single MP3
+
+    on_first_segment(mp3_bytes) is called from the calling thread as soon as
+    the first segment is ready, so playback can start before the rest is done.
+    """
+    parts = []
+    segments = iter_synthesized_segments(text, language_code, slow, max_workers)
+    for segment_bytes in get_metrics().timed_iter(segments, "tts", language=language_code):
+        if not parts and on_first_segment:
+            on_first_segment(segment_bytes)
+        parts.append(segment_bytes)
+    # MP3 frames are self-contained, so in-order concatenation needs no re-encoding
+    return b"".join(parts)
+
+
+class SentencePipeline:
+    """Hand completed sentences of a growing text to TTS while the text streams in"""
+
+    def __init__(self, language_code, slow=False, max_workers=MAX_WORKERS):
+        self.language_code = language_code
+        self.slow = slow
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._futures = []
+        self._buffer = ""
+
+    def feed(self, fragment):
+        """Add streamed text and submit every sentence it completes"""
+        self._buffer += fragment
+        segments = split_segments(self._buffer)
+        # The last segment may still be growing, so hold it back until the next one starts
+        self._buffer = segments.pop() if segments else ""
+        if len(self._buffer) > SEGMENT_MAX_CHARS:
+            # A run-on sentence is handed off in word-aligned pieces instead of waiting for its end
+            pieces = _split_long(self._buffer, SEGMENT_MAX_CHARS)
+            self._buffer = pieces.pop()
+            segments.extend(pieces)
+        for segment in segments:
+            self._submit(segment)
+
+    def _submit(self, segment):
+        """Start synthesizing one sentence in the background"""
+        if segment.strip():
+            self._futures.append(
+                self._executor.submit(synthesize_segment, segment.strip(), self.language_code, self.slow)
+            )
+
+    def first_segment(self):
+        """Return the first sentence's MP3 bytes if already synthesized, else None"""
+        if self._futures and self._futures[0].done() and not self._futures[0].exception():
+            return self._futures[0].result()
+        return None
+
+    def finish(self):
+        """Flush the trailing sentence and return the joined MP3 in order"""
+        self._submit(self._buffer)
+        self._buffer = ""
+        try:
+            parts = [
+                _strip_id3(future.result(), keep_header=index == 0)
+                for index, future in enumerate(self._futures)
+            ]
+        finally:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        if not parts:
+            raise ValueError("No text to synthesize")
+        return b"".join(parts)
+
+    def cancel(self):
+        """Abandon pending synthesis, e.g. when the translation fails"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,69 @@
+# validation.py - Input validation and user-facing error messages shared by the UI and batch runner
+import re
+
+from rate_limiter import is_rate_limit_message
+
+# Long inputs are split into chunks by translation_engine, so this only guards
+# against runaway inputs rather than a single-request limit
+MAX_TEXT_LENGTH = 1_000_000
+
+
+def validate_text_length(text, max_length=MAX_TEXT_LENGTH):
+    """Validate text length for translation"""
+    if not text or not text.strip():
+        return False, "Please enter some text to translate"
+
+    char_count = len(text.strip())
+    if char_count > max_length:
+        return False, f"Text is too long ({char_count:,} characters). Maximum allowed: {max_length:,} characters"
+
+    if char_count < 3:
+        return False, "Text is too short. Please enter at least 3 characters"
+
+    return True, ""
+
+
+def validate_api_key(api_key):
+    """Validate API key format"""
+    if not api_key or not api_key.strip():
+        return False, "API key is required"
+
+    # Basic format check for Google API key
+    if not api_key.startswith('AIza'):
+        return False, "Invalid API key format. Google API keys should start with 'AIza'"
+
+    if len(api_key) < 30:
+        return False, "API key appears to be incomplete"
+
+    return True, ""
+
+
+def translation_error_message(error_msg):
+    """Map a translation exception message to a user-facing error"""
+    if is_rate_limit_message(error_msg):
+        return "❌ API quota exceeded even after automatic retries. Please check your Gemini API usage limits."
+    elif "invalid" in error_msg.lower():
+        return "❌ Invalid API key. Please check your Gemini API key."
+    elif "network" in error_msg.lower() or "connection" in error_msg.lower():
+        return "❌ Network error. Please check your internet connection and try again."
+    elif "empty result" in error_msg.lower():
+        return "❌ Translation returned empty result. Please try again."
+    else:
+        return f"❌ Translation failed: {error_msg}"
+
+
+def validate_file_size(file_size, max_size_mb=10):
+    """Validate uploaded file size"""
+    max_size_bytes = max_size_mb * 1024 * 1024
+    if file_size > max_size_bytes:
+        return False, f"File is too large ({file_size/1024/1024:.1f} MB). Maximum allowed: {max_size_mb} MB"
+    return True, ""
+
+
+def sanitize_filename(filename):
+    """Create safe filename for downloads"""
+    # Remove unsafe characters
+    safe_name = re.sub(r'[<>:"/\\|?*]', '_', filename)
+    # Remove extra spaces and dots
+    safe_name = re.sub(r'[.\s]+', '_', safe_name)
+    return safe_name[:50]  # Limit length